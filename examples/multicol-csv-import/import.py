@@ -1,12 +1,25 @@
 #! /usr/bin/env python3
 
+import array
+import csv
+import io
+import itertools
+import mmap
 import sys
-import threading
-from queue import Queue
+import textwrap
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, \
+    as_completed, wait
 
 from pilosa import Client, Schema
 from pilosa.imports import Column, FieldValue
 
+try:
+    import pyarrow
+    from pyarrow import csv as arrow_csv
+except ImportError:
+    # fall back to the pure Python CSV parser
+    arrow_csv = None
+
 # adapt these to match the CSV file
 INDEX_NAME = "my-index"
 INDEX_KEYS = True
@@ -25,106 +38,339 @@ FIELDS = [
 ]
 # -----------------------------
 # other settings
-THREAD_COUNT = 0  # 0 = use the number of CPUs available to this process
+WORKER_COUNT = 0  # 0 = use the number of CPUs available to this process
+BATCH_SIZE = 1000000  # number of bits sent to the server per import request and shard
+IMPORT_THREADS = 2  # number of batches each worker sends to the server concurrently
+RANGE_SIZE = 32 << 20  # number of bytes of the CSV file each worker parses at once
 VERBOSE = True
 #------------------------------
 
-if not THREAD_COUNT:
+if not WORKER_COUNT:
     import os
-    THREAD_COUNT = len(os.sched_getaffinity(0))
+    WORKER_COUNT = len(os.sched_getaffinity(0))
+
+
+def csv_ranges(mm, range_size, has_header=True):
+    """Splits the mapped CSV file into byte ranges of about range_size bytes.
+
+    Each range ends at a line boundary, so it can be parsed on its own.
+    A quoted value may contain a newline, so a file with quotes is not split.
+    """
+    size = len(mm)
+    start = 0
+    if has_header:
+        # if there's a header skip it
+        newline = mm.find(b"\n")
+        start = size if newline < 0 else newline + 1
+    if mm.find(b'"', start) >= 0:
+        return [(start, size)] if start < size else []
+    ranges = []
+    while start < size:
+        newline = mm.find(b"\n", min(start + max(range_size, 1), size) - 1)
+        end = size if newline < 0 else newline + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def csv_width(mm):
+    """Returns the number of columns in the first line of the mapped CSV file."""
+    newline = mm.find(b"\n")
+    return mm[:newline if newline >= 0 else len(mm)].count(b",") + 1
+
+
+def read_columns(mm, start, end, width, int_columns=()):
+    """Parses the given byte range of the mapped CSV file.
+
+    Returns the columns as lists.
+    If pyarrow is installed, the range is tokenized by its C parser
+    and the columns in int_columns are converted to ints while parsing.
+    Otherwise the lines are split by the csv module and all values are strings.
+    """
+    if arrow_csv is not None:
+        return _read_columns_arrow(mm, start, end, width, int_columns)
+    return _read_columns_python(mm, start, end, width)
+
+
+def _read_columns_arrow(mm, start, end, width, int_columns):
+    column_names = ["c%d" % i for i in range(width)]
+    string_types = dict.fromkeys(column_names, pyarrow.string())
+    int_types = dict(string_types)
+    for i in int_columns:
+        int_types[column_names[i]] = pyarrow.int64()
+    # wrap the mapped range without copying it
+    data = pyarrow.py_buffer(mm).slice(start, end - start)
+    try:
+        return _read_arrow_batches(data, column_names, int_types)
+    except pyarrow.ArrowInvalid:
+        pass
+    try:
+        # an int column has a value which is not an int;
+        # read all columns as strings, invalid values are handled per row
+        return _read_arrow_batches(data, column_names, string_types)
+    except pyarrow.ArrowInvalid:
+        # a row has fewer or more values than the header;
+        # the csv module pads short rows, so both readers accept the same input
+        return _read_columns_python(mm, start, end, width)
+
+
+def _read_arrow_batches(data, column_names, column_types):
+    read_options = arrow_csv.ReadOptions(
+        column_names=column_names,
+        block_size=1 << 20)
+    convert_options = arrow_csv.ConvertOptions(column_types=column_types)
+    reader = arrow_csv.open_csv(pyarrow.BufferReader(data),
+                                read_options=read_options,
+                                convert_options=convert_options)
+    # stream the range block by block, so only one block is kept in Arrow memory
+    columns = [[] for _ in column_names]
+    for batch in reader:
+        for column, values in zip(columns, batch.columns):
+            column.extend(values.to_pylist())
+    return columns
+
+
+def _read_columns_python(mm, start, end, width):
+    # the range is decoded in a single call and split by the C reader of the csv module
+    text = io.StringIO(mm[start:end].decode("utf-8"), newline="")
+    # skip empty lines
+    rows = [row for row in csv.reader(text) if len(row) > 1 or (row and row[0].strip())]
+    # transpose the rows, short rows are padded so the columns stay aligned;
+    # the values are stripped by the bit yielders if needed
+    columns = [list(column) for column in itertools.zip_longest(*rows, fillvalue="")]
+    while len(columns) < width:
+        columns.append([""] * len(rows))
+    return columns
+
+
+def parse_fixed_point(s, frac_digits):
+    """Parses a decimal string into an int scaled by 10**frac_digits.
+
+    Extra fractional digits are truncated. Unlike int(float(s) * 10**frac_digits),
+    the result doesn't depend on floating point rounding.
+    """
+    s = s.strip()
+    sign = s[:1]
+    unsigned = s[1:] if sign in ("+", "-") else s
+    whole, _, frac = unsigned.partition(".")
+    if not (whole + frac).isdigit():
+        # not a plain decimal number (e.g., 1e-5), fall back to float
+        return int(float(s) * 10**frac_digits)
+    frac = frac[:frac_digits]
+    value = int(whole or "0") * 10**frac_digits
+    if frac:
+        value += int(frac) * 10**(frac_digits - len(frac))
+    return -value if sign == "-" else value
+
+
+def bulk_int(values):
+    """Converts all values to ints in a single C level loop.
+
+    The ints are stored in a signed 64bit array, which takes 8 bytes per value
+    instead of a pointer and an int object.
+    Returns None if any of the values is not an integer or doesn't fit in 64 bits.
+    """
+    try:
+        return array.array("q", map(int, values))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def sort_by_column(column_ids, row_ids):
+    """Sorts the int id columns by column ID.
+
+    Consecutive bits then belong to the same shard,
+    so each batch is split into as few per shard import requests as possible.
+    """
+    # sort the positions, so no tuples are created for the pairs
+    order = sorted(range(len(column_ids)), key=column_ids.__getitem__)
+    column_ids = array.array("q", map(column_ids.__getitem__, order))
+    row_ids = array.array("q", map(row_ids.__getitem__, order))
+    return column_ids, row_ids
+
+
+# loop bodies of the generated bit generators, c and r are the column and row values
+_FIELD_BODY = """\
+try:
+    value = row_value(r)
+except (TypeError, ValueError):
+    # cannot convert to a float or int, skip this one
+    continue
+yield field_value(%s, value=value)
+"""
+_BIT_BODY = "yield column(%s, %s)\n"
+
+
+def compile_bits(body, **names):
+    """Compiles a generator function which runs body for each column and row value.
+
+    The names used in body are bound as default arguments,
+    so they are local variable lookups in the generated code.
+    """
+    args = "".join(", %s=%s" % (name, name) for name in names)
+    source = "def bits(column_values, row_values%s):\n" \
+             "    for c, r in zip(column_values, row_values):\n" \
+             "%s" % (args, textwrap.indent(body, " " * 8))
+    namespace = {}
+    exec(source, names, namespace)
+    return namespace["bits"]
 
 
 class MultiColumnBitIterator:
 
     def __init__(self,
-            file_obj, field,
-            column_index=0, row_index=1,
-            has_header=True,
+            column_values, row_values, field,
             float_frac=0):
-        self.file_obj = file_obj
-        if has_header:
-            # if there's a header skip it
-            next(self.file_obj)
-
-        ci = column_index
-        ri = row_index
-        float_mul = 10**float_frac
-
-        def row_value(fs):
-            try:
-                if float_frac:
-                    # try to get row id field as a float
-                    return int(float(fs[ri]) * float_mul)
-                else:
-                    # try to getrow id field as an int
-                    return int(fs[ri])
-            except ValueError:
-                # cannot convert to a float or int, skip this one
-                return None
-
-        def field_with_column_key(fs):
-            value = row_value(fs)
-            if value is None:
-                return None
-            return FieldValue(column_key=fs[ci], value=value)
-
-        def field_with_column_id(fs):
-            value = row_value(fs)
-            if value is None:
-                return None
-            return FieldValue(column_id=int(fs[ci]), value=value)
-
-        # set the bit yielder
+        self.column_values = column_values
+        self.row_values = row_values
+
+        if float_frac:
+            def row_value(r):
+                # try to get row id field as a fixed point number
+                return parse_fixed_point(r, float_frac)
+        else:
+            # try to get row id field as an int
+            row_value = int
+
+        def convert_ids():
+            # numeric only columns are converted up front instead of per row
+            column_ids = bulk_int(column_values)
+            if column_ids is None:
+                return False
+            row_ids = bulk_int(row_values)
+            if row_ids is None:
+                return False
+            # the server imports shard by shard, keys are mapped to shards by the server
+            self.column_values, self.row_values = sort_by_column(column_ids, row_ids)
+            return True
+
+        # values aren't stripped by the parser; int() ignores the whitespace
+        # around a number, so only the keys are stripped
+        column_key = "column_key=c.strip()"
+        column_id = "column_id=int(c)"
+        row_key = "row_key=r.strip()"
+        row_id = "row_id=int(r)"
+
+        # the generator is specialized for the field once here, not per row
+        body = None
         if field.field_type == "int":
             if field.index.keys:
-                self.yield_fun = field_with_column_key
+                body = _FIELD_BODY % column_key
+            elif not float_frac and convert_ids():
+                # both columns were converted by bulk_int, so the loop is run by map in C;
+                # the positional arguments are column_id, column_key and value
+                self.bits = lambda c, r: map(FieldValue, c, itertools.repeat(""), r)
             else:
-                self.yield_fun = field_with_column_id
+                body = _FIELD_BODY % column_id
         else:
             if field.index.keys:
-                if field.keys:
-                    self.yield_fun = lambda fs: Column(column_key=fs[ci], row_key=fs[ri] )
-                else:
-                    self.yield_fun = lambda fs: Column(column_key=fs[ci], row_id=int(fs[ri]))
+                body = _BIT_BODY % (column_key, row_key if field.keys else row_id)
+            elif field.keys:
+                body = _BIT_BODY % (column_id, row_key)
+            elif convert_ids():
+                # the positional arguments are row_id and column_id
+                self.bits = lambda c, r: map(Column, r, c)
             else:
-                if field.keys:
-                    self.yield_fun = lambda fs: Column(column_id=int(fs[ci]), row_key=fs[ri] )
-                else:
-                    self.yield_fun = lambda fs: Column(column_id=int(fs[ci]), row_id=int(fs[ri]))
-    
+                body = _BIT_BODY % (column_id, row_id)
+        if body is not None:
+            self.bits = compile_bits(body,
+                                     column=Column,
+                                     field_value=FieldValue,
+                                     row_value=row_value)
+
     def __call__(self):
-        yield_fun = self.yield_fun
-        for line in self.file_obj:
-            # skip empty lines
-            line = line.strip()
-            if not line:
-                continue
-            # split fields
-            fs = [x.strip() for x in line.split(",")]
-            # return a bit
-            bit = yield_fun(fs)
-            if bit is not None:
-                yield bit
-
-
-def import_field(q, client, path):
+        return self.bits(self.column_values, self.row_values)
+
+
+def make_client(pilosa_addr):
+    # urllib3 keeps the connections of a client alive between requests;
+    # a process sends at most IMPORT_THREADS requests at a time
+    return Client(pilosa_addr,
+                  socket_timeout=20000000,
+                  pool_size_per_route=IMPORT_THREADS)
+
+
+# set by init_worker in each worker process
+_client = None
+_fields = None
+_mm = None
+_width = 0
+
+
+def init_worker(pilosa_addr, fields, path, width):
+    global _client, _fields, _mm, _width
+    # a client can't be shared between processes, so each worker creates its own
+    # and reuses it for all the ranges it imports
+    _client = make_client(pilosa_addr)
+    _fields = fields
+    with open(path, "rb") as f:
+        _mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _width = width
+
+
+def prefetch(mm, start, end):
+    """Asks the kernel to read the given byte range of the mapping ahead.
+
+    The range is scanned once from start to end,
+    so the pages are read with large sequential reads instead of page faults.
+    """
+    if not hasattr(mm, "madvise"):
+        # Python < 3.8 or a platform without madvise
+        return
+    # madvise requires a page aligned start
+    offset = start - start % mmap.PAGESIZE
+    mm.madvise(mmap.MADV_SEQUENTIAL, offset, end - offset)
+    mm.madvise(mmap.MADV_WILLNEED, offset, end - offset)
+
+
+def batches(bits, size):
+    """Splits the bits into lists of at most size bits."""
+    bits = iter(bits)
     while True:
-        item = q.get()
-        if item is None:
-            break
-        field, row_index, float_frac = item
-        print("Importing field:", field.name)
-        with open(path) as f:
-            mcb = MultiColumnBitIterator(f,
+        batch = list(itertools.islice(bits, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_range(start, end):
+    prefetch(_mm, start, end)
+    # parse the rows in the range once, each field is imported from its own column;
+    # id and int columns are converted by the parser if possible
+    int_columns = [i + 1 for i, (field, float_frac) in enumerate(_fields)
+                   if not field.keys and not float_frac]
+    if _fields and not _fields[0][0].index.keys:
+        int_columns.append(0)
+    columns = read_columns(_mm, start, end, _width, int_columns)
+    column_values = columns[0]
+    # the next batch is built while the previous ones are being sent;
+    # besides the parsed columns of the range (about RANGE_SIZE bytes of the file),
+    # at most IMPORT_THREADS batches being sent and the one being built are kept in memory
+    with ThreadPoolExecutor(max_workers=IMPORT_THREADS) as executor:
+        pending = set()
+        for i, (field, float_frac) in enumerate(_fields):
+            print("Importing field: %s (bytes %d-%d)" % (field.name, start, end))
+            mcb = MultiColumnBitIterator(column_values,
+                                         columns[i + 1],
                                          field,
-                                         row_index=row_index,
                                          float_frac=float_frac)
-            client.import_field(field, mcb())
-        q.task_done()
+            # set fields with column and row ids are sent as one roaring bitmap
+            # per shard instead of a list of bits
+            fast_import = field.field_type == "set" and not field.keys and not field.index.keys
+            for batch in batches(mcb(), BATCH_SIZE):
+                if len(pending) >= IMPORT_THREADS:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        # raise errors from the import
+                        future.result()
+                pending.add(executor.submit(_client.import_field, field, iter(batch),
+                                            batch_size=BATCH_SIZE, fast_import=fast_import))
+        for future in pending:
+            future.result()
 
 
 def import_csv(pilosa_addr, path):
-    client = Client(pilosa_addr, socket_timeout=20000000)
+    client = make_client(pilosa_addr)
 
     # create the schema
     schema = Schema()
@@ -140,10 +386,10 @@ def import_csv(pilosa_addr, path):
             float_frac = opts["float_frac"]
             del opts["float_frac"]
         if "float_min" in opts:
-            opts["int_min"] = int(opts["float_min"] * 10**float_frac)
+            opts["int_min"] = parse_fixed_point(repr(opts["float_min"]), float_frac)
             del opts["float_min"]
         if "float_max" in opts:
-            opts["int_max"] = int(opts["float_max"] * 10**float_frac)
+            opts["int_max"] = parse_fixed_point(repr(opts["float_max"]), float_frac)
             del opts["float_max"]
 
         field = index.field(field["name"], **opts)
@@ -151,26 +397,26 @@ def import_csv(pilosa_addr, path):
 
     client.sync_schema(schema)
 
-    # import each field
-    q = Queue()
-    threads = []
-    for i in range(THREAD_COUNT):
-        t = threading.Thread(target=import_field,
-                             args=(q, client, path))
-        t.start()
-        threads.append(t)
-
-    for i, (field, float_frac) in enumerate(fields):
-        q.put((field, i + 1, float_frac))
-
-    # wait for imports to finish
-    q.join()
+    # split the file into line aligned byte ranges of a fixed size,
+    # so the memory used by a worker doesn't depend on the size of the file
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            width = csv_width(mm)
+            ranges = csv_ranges(mm, RANGE_SIZE)
 
-    # stop workers
-    for _ in threads:
-        q.put(None)
-    for t in threads:
-        t.join()
+    # each worker process parses one range at a time and imports all fields from it
+    with ProcessPoolExecutor(max_workers=WORKER_COUNT,
+                             initializer=init_worker,
+                             initargs=(pilosa_addr, fields, path, width)) as executor:
+        futures = {executor.submit(import_range, start, end): (start, end)
+                   for start, end in ranges}
+        # report the ranges in the order they finish, not in the order they were submitted
+        for done, future in enumerate(as_completed(futures), 1):
+            # errors in the workers are raised here
+            future.result()
+            if VERBOSE:
+                start, end = futures[future]
+                print("Imported bytes %d-%d (%d/%d ranges)" % (start, end, done, len(futures)))
 
 
 def main():
@@ -182,7 +428,10 @@ def main():
     path = sys.argv[2]
 
     print("Pilosa Address:", pilosa_addr)
-    print("Thread Count  :", THREAD_COUNT)
+    print("Worker Count  :", WORKER_COUNT)
+    print("Batch Size    :", BATCH_SIZE)
+    print("Import Threads:", IMPORT_THREADS)
+    print("Range Size    :", RANGE_SIZE)
     print("CSV Path      :", path)
     print("Verbose       :", VERBOSE)
     print()
@@ -30,53 +30,90 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
 # DAMAGE.
 #
+import itertools
+import os
 import threading
 import unittest
 from datetime import datetime
-from wsgiref.simple_server import make_server
+from io import StringIO
+from multiprocessing.pool import ThreadPool
+from wsgiref.simple_server import WSGIServer, make_server
 from wsgiref.util import setup_testing_defaults
 
 try:
-    from io import StringIO
+    from socketserver import ThreadingMixIn
 except ImportError:
-    from StringIO import StringIO
+    # Python 2
+    from SocketServer import ThreadingMixIn
 
 from pilosa.client import Client, URI, Cluster, PilosaServerError
 from pilosa.exceptions import PilosaError
 from pilosa.orm import Index, TimeQuantum, Schema, CacheType
 from pilosa.response import GroupCount, FieldRow
-from pilosa.imports import csv_column_reader, csv_field_value_reader, \
+from pilosa.imports import Column, csv_column_reader, csv_field_value_reader, \
     csv_column_id_value, csv_column_key_value, csv_row_key_column_id
+from tests.mock_pool_manager import MockPoolManager
 
+IMPORT_CSV = u"""
+    10, 7
+    10, 5
+    2, 3
+    7, 1
+"""
+# parsed once for the tests which exercise the import modes, not the CSV reader
+IMPORT_BITS = list(csv_column_reader(StringIO(IMPORT_CSV)))
 
-class ClientIT(unittest.TestCase):
-
-    counter = 0
+_index_counter = itertools.count(1)
+# in milliseconds; longer than a test class takes to run
+SCHEMA_CACHE_TTL = 10 * 60 * 1000
+# pytest-xdist runs the tests in several worker processes against the same server,
+# so index names include the worker id; it's empty when the tests run in a single process
+_WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "")
 
-    def setUp(self):
-        self.schema = Schema()
-        self.index = self.schema.index(self.random_index_name())
-        client = self.get_client()
-        self.index.field("another-field")
-        self.index.field("test")
-        self.index.field("count-test")
-        self.index.field("topn_test")
 
-        self.col_index = self.schema.index(self.index.name + "-opts")
-        self.field = self.col_index.field("collab")
+class ClientIT(unittest.TestCase):
 
-        self.key_index = self.schema.index("key-index", keys=True)
+    client = None
+    manual_address_client = None
 
-        client.sync_schema(self.schema)
+    @classmethod
+    def setUpClass(cls):
+        # the clients are shared by all tests, so keep-alive connections are reused
+        server_address = cls.get_server_address()
+        # only these clients change the schema of the test indexes, so they can cache it;
+        # ensure_index and ensure_field then skip the indexes and fields the client already created
+        cls.client = Client(server_address, tls_skip_verify=True,
+                            schema_cache_ttl=SCHEMA_CACHE_TTL)
+        cls.manual_address_client = Client(server_address, tls_skip_verify=True, use_manual_address=True,
+                                           schema_cache_ttl=SCHEMA_CACHE_TTL)
+        # the indexes are created once for the class instead of for every test;
+        # each test writes to fields of its own, so the tests don't see each other's data
+        cls.schema = Schema()
+        cls.index = cls.schema.index(cls.random_index_name())
+        cls.index.field("another-field")
+        cls.index.field("test")
+        cls.index.field("count-test")
+        cls.index.field("topn_test")
+
+        cls.col_index = cls.schema.index(cls.index.name + "-opts")
+        cls.field = cls.col_index.field("collab")
+
+        cls.key_index = cls.schema.index(cls.index_name("key-index"), keys=True)
+        cls.get_client().sync_schema(cls.schema)
 
-    def tearDown(self):
-        client = self.get_client()
-        client.delete_index(self.index)
-        client.delete_index(self.col_index)
-        client.delete_index(self.key_index)
+    @classmethod
+    def tearDownClass(cls):
+        client = cls.get_client()
+        # the indexes are independent, so they're deleted in parallel
+        cls.run_concurrently(
+            lambda: client.delete_index(cls.index),
+            lambda: client.delete_index(cls.col_index),
+            lambda: client.delete_index(cls.key_index))
+        cls.client = None
+        cls.manual_address_client = None
 
     def test_create_index(self):
-        index_name = "some-index"
+        index_name = self.index_name("some-index")
         client = self.get_client()
         schema = Schema()
         index = schema.index(index_name, track_existence=True, keys=True)
@@ -101,7 +138,7 @@ class ClientIT(unittest.TestCase):
         # Check the field time quantum
         index = schema._indexes[self.index.name]
         field = index._fields["field-with-timequantum"]
-        self.assertEquals(TimeQuantum.YEAR.value, field.time_quantum.value)
+        self.assertEqual(TimeQuantum.YEAR.value, field.time_quantum.value)
 
     def test_query(self):
         client = self.get_client()
@@ -112,21 +149,24 @@ class ClientIT(unittest.TestCase):
 
     def test_query_with_columns(self):
         client = self.get_client()
-        field = self.index.field("query-test")
+        field = self.index.field("query-columns-test")
         client.ensure_field(field)
-        client.query(field.set(100, 1000))
         column_attrs = {"name": "bombo"}
-        client.query(self.index.set_column_attrs(1000, column_attrs))
-        response = client.query(field.row(100), column_attrs=True)
+        response = client.query(self.index.batch_query(
+            field.set(100, 1000),
+            self.index.set_column_attrs(1000, column_attrs),
+            field.row(100),
+        ), column_attrs=True)
         self.assertTrue(response is not None)
-        self.assertEquals(1000, response.column.id)
-        self.assertEquals({"name": "bombo"}, response.column.attributes)
+        self.assertEqual(1000, response.column.id)
+        self.assertEqual({"name": "bombo"}, response.column.attributes)
 
         response = client.query(field.row(300))
         self.assertTrue(response.column is None)
 
     def test_failed_connection(self):
-        client = Client("http://non-existent-sub.pilosa.com:22222")
+        # retrying a host which can't be resolved only slows down the test
+        client = Client("http://non-existent-sub.pilosa.com:22222", retry_count=0)
         self.assertRaises(PilosaError, client.query, self.field.set(15, 10))
 
     def test_parse_error(self):
@@ -136,55 +176,49 @@ class ClientIT(unittest.TestCase):
 
     def test_orm_count(self):
         client = self.get_client()
+        # created in setUpClass
         count_field = self.index.field("count-test")
-        client.ensure_field(count_field)
         qry = self.index.batch_query(
             count_field.set(10, 20),
             count_field.set(10, 21),
-            count_field.set(15, 25))
-        client.query(qry)
-        response = client.query(self.index.count(count_field.row(10)))
-        self.assertEquals(2, response.result.count)
+            count_field.set(15, 25),
+            self.index.count(count_field.row(10)))
+        response = client.query(qry)
+        self.assertEqual(2, response.results[-1].count)
 
     def test_new_orm(self):
         client = self.get_client()
-        response1 = client.query(self.field.set(10, 20))
-        self.assertTrue(response1.result.changed)
-        response2 = client.query(self.field.row(10))
-        self.assertEquals(0, len(response2.columns))
-        row1 = response2.result.row
-        self.assertEquals(0, len(row1.attributes))
-        self.assertEquals(1, len(row1.columns))
-        self.assertEquals(20, row1.columns[0])
-
         column_attrs = {"name": "bombo"}
-        client.query(self.col_index.set_column_attrs(20, column_attrs))
-        response3 = client.query(self.field.row(10), column_attrs=True)
-        column = response3.column
-        self.assertTrue(column is not None)
-        self.assertEquals(20, column.id)
-
         row_attrs = {
             "active": True,
             "unsigned": 5,
             "height": 1.81,
             "name": "Mr. Pi"
         }
-        client.query(self.field.set_row_attrs(10, row_attrs))
-        response4 = client.query(self.field.row(10))
-        row = response4.result.row
-        self.assertEquals(1, len(row.columns))
-        self.assertEquals(4, len(row.attributes))
-        self.assertEquals(True, row.attributes["active"])
-        self.assertEquals(5, row.attributes["unsigned"])
-        self.assertEquals(1.81, row.attributes["height"])
-        self.assertEquals("Mr. Pi", row.attributes["name"])
-
-        response5 = client.query(self.field.clear(10, 20))
-        self.assertTrue(response5.result.changed)
-        response6 = client.query(self.field.row(10))
-        row = response6.result.row
-        self.assertEquals(0, len(row.columns))
+        # the writes don't depend on each other, so they're sent with the read in a single request
+        response1 = client.query(self.col_index.batch_query(
+            self.field.set(10, 20),
+            self.col_index.set_column_attrs(20, column_attrs),
+            self.field.set_row_attrs(10, row_attrs),
+            self.field.row(10),
+        ), column_attrs=True)
+        self.assertTrue(response1.results[0].changed)
+        column = response1.column
+        self.assertTrue(column is not None)
+        self.assertEqual(20, column.id)
+        self.assertEqual(column_attrs, column.attributes)
+
+        row = response1.results[3].row
+        self.assertEqual([20], row.columns)
+        self.assertEqual(row_attrs, row.attributes)
+
+        response2 = client.query(self.col_index.batch_query(
+            self.field.clear(10, 20),
+            self.field.row(10),
+        ))
+        self.assertTrue(response2.results[0].changed)
+        row = response2.results[1].row
+        self.assertEqual(0, len(row.columns))
 
     def test_topn(self):
         client = self.get_client()
@@ -194,102 +228,115 @@ class ClientIT(unittest.TestCase):
             field.set(10, 10),
             field.set(10, 15),
             field.set(20, 5),
-            field.set(30, 5)))
+            field.set(30, 5),
+            field.set_row_attrs(10, {"foo": "bar"})))
         # XXX: The following is required to make this test pass. See: https://github.com/pilosa/pilosa/issues/625
         client.http_request("POST", "/recalculate-caches")
-        response = client.query(field.topn(2))
-        items = response.result.count_items
-        self.assertEquals(2, len(items))
+        response = client.query(self.index.batch_query(
+            field.topn(2),
+            field.topn(5, row=field.row(10)),
+            field.topn(5, None, "foo", "bar")))
+        self.assertEqual(3, len(response.results))
+        items = response.results[0].count_items
+        self.assertEqual(2, len(items))
         item = items[0]
-        self.assertEquals(10, item.id)
-        self.assertEquals(3, item.count)
+        self.assertEqual(10, item.id)
+        self.assertEqual(3, item.count)
 
-        response = client.query(field.topn(5, row=field.row(10)))
-        items = response.result.count_items
-        self.assertEquals(3, len(items))
+        items = response.results[1].count_items
+        self.assertEqual(3, len(items))
         item = items[0]
-        self.assertEquals(3, item.count)
+        self.assertEqual(3, item.count)
 
-        client.query(field.set_row_attrs(10, {"foo": "bar"}))
-        response = client.query(field.topn(5, None, "foo", "bar"))
-        items = response.result.count_items
-        self.assertEquals(1, len(items))
+        items = response.results[2].count_items
+        self.assertEqual(1, len(items))
         item = items[0]
-        self.assertEquals(3, item.count)
-        self.assertEquals(10, item.id)
+        self.assertEqual(3, item.count)
+        self.assertEqual(10, item.id)
 
     def test_keys(self):
         client = self.get_client()
         field = self.key_index.field("keys-test", keys=True)
         client.ensure_field(field)
 
-        client.query(field.set("stringRow", "stringCol"))
-        response = client.query(field.row("stringRow"))
-        self.assertEqual(["stringCol"], response.result.row.keys)
+        response = client.query(self.key_index.batch_query(
+            field.set("stringRow", "stringCol"),
+            field.row("stringRow"),
+        ))
+        self.assertEqual(["stringCol"], response.results[1].row.keys)
 
     def test_mutex_field(self):
         client = self.get_client()
         field = self.index.field("mutex-field", mutex=True)
         client.ensure_field(field)
-        client.query(field.set(1, 100))
-        response = client.query(field.row(1))
-        self.assertEqual([100], response.result.row.columns)
-
-        # setting another row removes the previous
-        client.query(field.set(42, 100))
+        # the calls of a batch run in order, so the reads see the writes before them
         response = client.query(self.index.batch_query(
+            field.set(1, 100),
+            field.row(1),
+            # setting another row removes the previous
+            field.set(42, 100),
             field.row(1),
             field.row(42)
         ))
-        self.assertEqual([], response.results[0].row.columns)
         self.assertEqual([100], response.results[1].row.columns)
+        self.assertEqual([], response.results[3].row.columns)
+        self.assertEqual([100], response.results[4].row.columns)
 
     def test_not_(self):
         client = self.get_client()
-        schema = client.schema()
-        index = schema.index("not-test", track_existence=True)
+        schema = Schema()
+        index = schema.index(self.index_name("not-test"), track_existence=True)
         field = index.field("f1")
         client.sync_schema(schema)
         try:
-            client.query(index.batch_query(
+            # the read is run after the writes in the same request
+            resp = client.query(index.batch_query(
                 field.set(1, 10),
                 field.set(1, 11),
                 field.set(2, 11),
                 field.set(2, 12),
                 field.set(2, 13),
+                index.not_(field.row(1)),
             ))
-            resp = client.query(index.not_(field.row(1)))
-            self.assertEqual([12, 13], resp.result.row.columns)
+            self.assertEqual([12, 13], resp.results[-1].row.columns)
         finally:
             client.delete_index(index)
 
     def test_store(self):
         client = self.get_client()
-        schema = client.schema()
-        index = schema.index("store-test", track_existence=True)
+        schema = Schema()
+        index = schema.index(self.index_name("store-test"), track_existence=True)
         from_field = index.field("from-field")
         to_field = index.field("to-field")
         client.sync_schema(schema)
         try:
-            client.query(index.batch_query(
+            resp = client.query(index.batch_query(
                 from_field.set(10, 100),
                 from_field.set(10, 200),
                 to_field.store(from_field.row(10), 1),
+                to_field.row(1),
             ))
-            resp = client.query(to_field.row(1))
-            self.assertEqual([100, 200], resp.result.row.columns)
+            self.assertEqual([100, 200], resp.results[-1].row.columns)
         finally:
             client.delete_index(index)
 
 
     def test_ensure_index_exists(self):
-        client = self.get_client()
+        # the shared client skips the indexes it knows about, this one gets the 409 from the server
+        client = Client(self.get_server_address(), tls_skip_verify=True)
         index = Index(self.index.name + "-ensure")
         client.ensure_index(index)
         client.create_field(index.field("frm"))
         client.ensure_index(index)
         client.delete_index(index)
 
+    def test_ensure_field_exists(self):
+        # the shared client skips the fields it knows about, this one gets the 409 from the server
+        client = Client(self.get_server_address(), tls_skip_verify=True)
+        field = self.index.field("ensure-field")
+        client.ensure_field(field)
+        client.ensure_field(field)
+
     def test_delete_field(self):
         client = self.get_client()
         field = self.index.field("to-delete")
@@ -299,19 +346,14 @@ class ClientIT(unittest.TestCase):
         client.create_field(field)
 
     def test_field_for_nonexisting_index(self):
-        client = self.get_client()
+        client = self.get_mock_client(404, content=b"index not found")
         index = Index("non-existing-database")
         field = index.field("frm")
         self.assertRaises(PilosaServerError, client.create_field, field)
 
     def test_csv_import(self):
         client = self.get_client()
-        text = u"""
-            10, 7
-            10, 5
-            2, 3
-            7, 1
-        """
+        text = IMPORT_CSV
         reader = csv_column_reader(StringIO(text))
         field = self.index.field("importfield")
         client.ensure_field(field)
@@ -341,14 +383,8 @@ class ClientIT(unittest.TestCase):
 
     def test_csv_import_manual_address(self):
         client = self.get_client_manual_address()
-        text = u"""
-            10, 7
-            10, 5
-            2, 3
-            7, 1
-        """
-        reader = csv_column_reader(StringIO(text))
-        field = self.index.field("importfield")
+        reader = iter(IMPORT_BITS)
+        field = self.index.field("importfield-manual-address")
         client.ensure_field(field)
         client.import_field(field, reader)
         bq = self.index.batch_query(
@@ -362,7 +398,7 @@ class ClientIT(unittest.TestCase):
         self.assertEqual(target, [result.row.columns[0] for result in response.results])
 
         # test clear import
-        reader = csv_column_reader(StringIO(text))
+        reader = iter(IMPORT_BITS)
         client.import_field(field, reader, clear=True)
         bq = self.index.batch_query(
             field.row(2),
@@ -376,16 +412,10 @@ class ClientIT(unittest.TestCase):
 
     def test_csv_roaring_import(self):
         client = self.get_client()
-        text = u"""
-            10, 7
-            10, 5
-            2, 3
-            7, 1
-        """
-        reader = csv_column_reader(StringIO(text))
+        reader = iter(IMPORT_BITS)
         field = self.index.field("importfield-fast")
         client.ensure_field(field)
-        client.import_field(field, reader, fast_import=True)
+        client.import_field(field, reader, fast_import=True, thread_count=2)
         bq = self.index.batch_query(
             field.row(2),
             field.row(7),
@@ -397,7 +427,7 @@ class ClientIT(unittest.TestCase):
         self.assertEqual(target, [result.row.columns[0] for result in response.results])
 
         # test clear import
-        reader = csv_column_reader(StringIO(text))
+        reader = iter(IMPORT_BITS)
         client.import_field(field, reader, fast_import=True, clear=True)
         bq = self.index.batch_query(
             field.row(2),
@@ -409,6 +439,24 @@ class ClientIT(unittest.TestCase):
         for result in response.results:
             self.assertEqual([], result.row.columns)
 
+    def test_import_concurrently(self):
+        client = self.get_client()
+        field = self.index.field("importfield-concurrent")
+        client.ensure_field(field)
+        # several batches for each of the shards, more batches than threads
+        column_ids = [shard * 1048576 + i for shard in range(6) for i in range(3)]
+        bits = [Column(row_id=1, column_id=column_id) for column_id in column_ids]
+        client.import_field(field, iter(bits), batch_size=2, thread_count=3)
+        response = client.query(field.row(1))
+        self.assertEqual(column_ids, response.result.row.columns)
+
+    def test_import_concurrently_failure(self):
+        client = self.get_client()
+        # the field is not created on the server, so each batch fails
+        field = self.index.field("importfield-concurrent-missing")
+        bits = [Column(row_id=1, column_id=shard * 1048576 + i) for shard in range(6) for i in range(3)]
+        self.assertRaises(PilosaError, client.import_field, field, iter(bits), batch_size=2, thread_count=3)
+
     def test_csv_roaring_import_time_field(self):
         client = self.get_client()
         text = u"""
@@ -421,21 +469,19 @@ class ClientIT(unittest.TestCase):
         field = self.index.field("importfield-fast-time", time_quantum=TimeQuantum.YEAR_MONTH_DAY_HOUR)
         client.ensure_field(field)
         client.import_field(field, reader, fast_import=True)
+        start = datetime(2016, 1, 1, 0, 0)
+        end = datetime(2019, 1, 1, 0, 0, 0)
         bq = self.index.batch_query(
             field.row(2),
             field.row(7),
             field.row(10),
+            field.row(10, from_=start, to=end),
         )
         response = client.query(bq)
         target = [3, 1, 5]
-        self.assertEqual(3, len(response.results))
-        self.assertEqual(target, [result.row.columns[0] for result in response.results])
-
-        target = [5, 7]
-        start = datetime(2016, 1, 1, 0, 0)
-        end = datetime(2019, 1, 1, 0, 0, 0)
-        response = client.query(field.row(10, from_=start, to=end))
-        self.assertEqual(target, response.result.row.columns)
+        self.assertEqual(4, len(response.results))
+        self.assertEqual(target, [result.row.columns[0] for result in response.results[:3]])
+        self.assertEqual([5, 7], response.results[3].row.columns)
 
         # test clear import
         reader = csv_column_reader(StringIO(text))
@@ -481,7 +527,7 @@ class ClientIT(unittest.TestCase):
             seven, 1
         """
         reader = csv_column_reader(StringIO(text), formatfunc=csv_row_key_column_id)
-        field = self.index.field("importfield-keys", keys=True)
+        field = self.index.field("importfield-keys-manual-address", keys=True)
         client.ensure_field(field)
         client.import_field(field, reader)
         bq = self.index.batch_query(
@@ -503,9 +549,8 @@ class ClientIT(unittest.TestCase):
         """
         reader = csv_column_reader(StringIO(text))
         client = self.get_client()
-        schema = client.schema()
-        field = schema.index(self.index.name).field("importfield", time_quantum=TimeQuantum.YEAR_MONTH_DAY_HOUR)
-        client.sync_schema(schema)
+        field = self.index.field("importfield-time", time_quantum=TimeQuantum.YEAR_MONTH_DAY_HOUR)
+        client.ensure_field(field)
         client.import_field(field, reader)
         bq = self.index.batch_query(
             field.row(1),
@@ -526,15 +571,16 @@ class ClientIT(unittest.TestCase):
         client = self.get_client()
         field = self.index.field("import-value-field", int_max=100)
         field2 = self.index.field("import-value-field-set")
-        client.sync_schema(self.schema)
-        bq = self.index.batch_query(
-            field2.set(1, 10),
-            field2.set(1, 7)
-        )
+        self.run_concurrently(
+            lambda: client.ensure_field(field),
+            lambda: client.ensure_field(field2))
         client.import_field(field, reader)
-        client.query(bq)
-        response = client.query(field.sum(field2.row(1)))
-        self.assertEqual(8, response.result.value)
+        response = client.query(self.index.batch_query(
+            field2.set(1, 10),
+            field2.set(1, 7),
+            field.sum(field2.row(1)),
+        ))
+        self.assertEqual(8, response.results[2].value)
 
     def test_csv_value_import_column_keys(self):
         text = u"""
@@ -545,39 +591,39 @@ class ClientIT(unittest.TestCase):
         client = self.get_client()
         field = self.key_index.field("import-value-field-keys", int_max=100)
         field2 = self.key_index.field("import-value-field-keys-set")
-        client.sync_schema(self.schema)
-        bq = self.key_index.batch_query(
-            field2.set(1, "ten"),
-            field2.set(1, "seven")
-        )
+        self.run_concurrently(
+            lambda: client.ensure_field(field),
+            lambda: client.ensure_field(field2))
         client.import_field(field, reader)
-        client.query(bq)
-        response = client.query(field.sum(field2.row(1)))
-        self.assertEqual(8, response.result.value)
+        response = client.query(self.key_index.batch_query(
+            field2.set(1, "ten"),
+            field2.set(1, "seven"),
+            field.sum(field2.row(1)),
+        ))
+        self.assertEqual(8, response.results[2].value)
 
     def test_schema(self):
         client = self.get_client()
-        schema = client.schema()
-        self.assertGreaterEqual(len(schema._indexes), 1)
-        self.assertGreaterEqual(len(schema._indexes[self.col_index.name]._fields), 1)
         field = self.index.field("schema-test-field",
                                  cache_type=CacheType.LRU,
                                  cache_size=9999)
         client.ensure_field(field)
+        # a single read checks both the indexes from setUpClass and the new field
         schema = client.schema()
+        self.assertGreaterEqual(len(schema._indexes), 1)
+        self.assertGreaterEqual(len(schema._indexes[self.col_index.name]._fields), 1)
         f = schema._indexes[self.index.name]._fields["schema-test-field"]
-        self.assertEquals(CacheType.LRU, f.cache_type)
-        self.assertEquals(9999, f.cache_size)
+        self.assertEqual((CacheType.LRU, 9999), (f.cache_type, f.cache_size))
 
     def test_sync(self):
         client = self.get_client()
-        remote_index = Index("remote-index-1")
+        remote_index = Index(self.index_name("remote-index-1"))
         remote_field = remote_index.field("remote-field-1")
         schema1 = Schema()
-        index11 = schema1.index("diff-index1")
+        index11 = schema1.index(self.index_name("diff-index1"))
         index11.field("field1-1")
         index11.field("field1-2")
-        index12 = schema1.index("diff-index2")
+        index12 = schema1.index(self.index_name("diff-index2"))
         index12.field("field2-1")
         schema1.index(remote_index.name)
         try:
@@ -586,24 +632,26 @@ class ClientIT(unittest.TestCase):
             client.sync_schema(schema1)
             # check that the schema was created
             schema2 = client.schema()
-            self.assertTrue("remote-index-1" in schema2._indexes)
-            self.assertTrue("remote-field-1" in schema2.index("remote-index-1")._fields)
-            self.assertTrue("diff-index1" in schema2._indexes)
-            self.assertTrue("field1-1" in schema2.index("diff-index1")._fields)
-            self.assertTrue("field1-2" in schema2.index("diff-index1")._fields)
-            self.assertTrue("diff-index2" in schema2._indexes)
-            self.assertTrue("field2-1" in schema2.index("diff-index2")._fields)
+            self.assertTrue(remote_index.name in schema2._indexes)
+            self.assertTrue("remote-field-1" in schema2.index(remote_index.name)._fields)
+            self.assertTrue(index11.name in schema2._indexes)
+            self.assertTrue("field1-1" in schema2.index(index11.name)._fields)
+            self.assertTrue("field1-2" in schema2.index(index11.name)._fields)
+            self.assertTrue(index12.name in schema2._indexes)
+            self.assertTrue("field2-1" in schema2.index(index12.name)._fields)
         finally:
             try:
-                client.delete_index(remote_index)
-                client.delete_index(index11)
-                client.delete_index(index12)
+                # every delete is attempted, even if another one fails
+                self.run_concurrently(
+                    lambda: client.delete_index(remote_index),
+                    lambda: client.delete_index(index11),
+                    lambda: client.delete_index(index12))
             except PilosaError:
                 pass
 
     def test_failover_fail(self):
         uris = [URI.address("nonexistent%s" % i) for i in range(20)]
-        client = Client(Cluster(*uris))
+        client = Client(Cluster(*uris), retry_count=0)
         self.assertRaises(PilosaError, client.query, self.field.row(5))
 
     def test_failover_coordinator_fail(self):
@@ -620,71 +668,69 @@ class ClientIT(unittest.TestCase):
         client = self.get_client()
         field = self.col_index.field("test-range-field", time_quantum=TimeQuantum.MONTH_DAY_HOUR)
         client.ensure_field(field)
-        client.query(self.col_index.batch_query(
+        response = client.query(self.col_index.batch_query(
             field.set(10, 100, timestamp=datetime(2017, 1, 1, 0, 0)),
             field.set(10, 100, timestamp=datetime(2018, 1, 1, 0, 0)),
             field.set(10, 100, timestamp=datetime(2019, 1, 1, 0, 0)),
+            field.row(10, from_=datetime(2017, 5, 1, 0, 0), to=datetime(2018, 5, 1, 0, 0)),
         ))
-        response = client.query(field.row(10, from_=datetime(2017, 5, 1, 0, 0), to=datetime(2018, 5, 1, 0, 0)))
-        self.assertEqual([100], response.result.row.columns)
+        self.assertEqual([100], response.results[-1].row.columns)
 
     def test_range_field(self):
         client = self.get_client()
         field = self.col_index.field("rangefield", int_min=None, int_max=None)
         field2 = self.col_index.field("rangefield-set")
-        client.ensure_field(field)
-        client.ensure_field(field2)
-        client.query(self.col_index.batch_query(
+        self.run_concurrently(
+            lambda: client.ensure_field(field),
+            lambda: client.ensure_field(field2))
+        response = client.query(self.col_index.batch_query(
             field2.set(1, 10),
             field2.set(1, 100),
             field.setvalue(10, 11),
+            field.sum(field2.row(1)),
+            field.min(field2.row(1)),
+            field.max(field2.row(1)),
+            field.lt(15),
         ))
-        response = client.query(field.sum(field2.row(1)))
-        self.assertEquals(11, response.result.value)
-        self.assertEquals(1, response.result.count)
-
-        response = client.query(field.min(field2.row(1)))
-        self.assertEquals(11, response.result.value)
-        self.assertEquals(1, response.result.count)
+        self.assertEqual(7, len(response.results))
+        # sum, min and max
+        for result in response.results[3:6]:
+            self.assertEqual(11, result.value)
+            self.assertEqual(1, result.count)
 
-        response = client.query(field.max(field2.row(1)))
-        self.assertEquals(11, response.result.value)
-        self.assertEquals(1, response.result.count)
-
-        response = client.query(field.lt(15))
-        self.assertEquals(1, len(response.results))
-        self.assertEquals(10, response.result.row.columns[0])
+        result = response.results[6]
+        self.assertEqual(10, result.row.columns[0])
 
     def test_rows(self):
         client = self.get_client()
         index = self.index
         field = index.field("rowsfield")
         client.ensure_field(field)
-        client.query(index.batch_query(
+        resp = client.query(index.batch_query(
             field.set(1, 100),
             field.set(1, 200),
             field.set(2, 200),
+            field.rows(),
         ))
-        resp = client.query(field.rows())
         target = [1, 2]
-        self.assertEqual(target, resp.result.row_identifiers.ids)
+        self.assertEqual(target, resp.results[-1].row_identifiers.ids)
 
     def test_group_by(self):
         client = self.get_client()
         index = self.index
         field = index.field("groupbyfield")
         client.ensure_field(field)
-        client.query(index.batch_query(
+        resp = client.query(index.batch_query(
             field.set(1, 100),
             field.set(1, 200),
             field.set(2, 200),
+            index.group_by(field.rows()),
         ))
-        resp = client.query(index.group_by(field.rows()))
         target = [
             GroupCount([FieldRow("groupbyfield", 1)], 2),
             GroupCount([FieldRow("groupbyfield", 2)], 1),
         ]
-        self.assertEqual(target, resp.result.group_counts)
+        self.assertEqual(target, resp.results[-1].group_counts)
 
 
     def test_exclude_attrs_columns(self):
@@ -694,15 +740,20 @@ class ClientIT(unittest.TestCase):
             self.field.set_row_attrs(1, {"foo": "bar"})
         ))
 
+        # the reads use different options, so they can't be batched; send them in parallel
+        response1, response2 = self.run_concurrently(
+            lambda: client.query(self.field.row(1), exclude_columns=True),
+            lambda: client.query(self.field.row(1), exclude_attrs=True))
+
         # test exclude columns.
-        response = client.query(self.field.row(1), exclude_columns=True)
-        self.assertEquals(0, len(response.result.row.columns))
-        self.assertEquals(1, len(response.result.row.attributes))
+        response = response1
+        self.assertEqual(0, len(response.result.row.columns))
+        self.assertEqual(1, len(response.result.row.attributes))
 
         # test exclude attributes.
-        response = client.query(self.field.row(1), exclude_attrs=True)
-        self.assertEquals(1, len(response.result.row.columns))
-        self.assertEquals(0, len(response.result.row.attributes))
+        response = response2
+        self.assertEqual(1, len(response.result.row.columns))
+        self.assertEqual(0, len(response.result.row.attributes))
 
     def test_http_request(self):
         self.get_client().http_request("GET", "/status")
@@ -711,111 +762,143 @@ class ClientIT(unittest.TestCase):
         client = self.get_client()
         node = client._fetch_coordinator_node()
         uri = URI.address(self.get_server_address())
-        self.assertEquals(uri.scheme, node.scheme)
-        self.assertEquals(uri.host, node.host)
-        self.assertEquals(uri.port, node.port)
+        self.assertEqual(uri.scheme, node.scheme)
+        self.assertEqual(uri.host, node.host)
+        self.assertEqual(uri.port, node.port)
 
     def test_fetch_coordinator_node_failure(self):
-        server = MockServer(content=b'{"nodes":[]}')
-        with server:
-            client = Client(server.uri)
-            self.assertRaises(PilosaError, client._fetch_coordinator_node)
+        client = self.get_mock_client(content=b'{"nodes":[]}')
+        self.assertRaises(PilosaError, client._fetch_coordinator_node)
 
 
     def test_shards(self):
         shard_width = 1048576
         client = self.get_client()
+        field = self.col_index.field("shards-test")
+        client.ensure_field(field)
         client.query(self.col_index.batch_query(
-            self.field.set(1, 100),
-            self.field.set(1, shard_width),
-            self.field.set(1, shard_width*3),
+            field.set(1, 100),
+            field.set(1, shard_width),
+            field.set(1, shard_width*3),
         ))
 
-        response = client.query(self.field.row(1), shards=[0,3])
-        self.assertEquals(2, len(response.result.row.columns))
-        self.assertEquals(100, response.result.row.columns[0])
-        self.assertEquals(shard_width*3, response.result.row.columns[1])
+        response = client.query(field.row(1), shards=[0,3])
+        self.assertEqual(2, len(response.result.row.columns))
+        self.assertEqual(100, response.result.row.columns[0])
+        self.assertEqual(shard_width*3, response.result.row.columns[1])
 
     def test_create_index_fail(self):
-        server = MockServer(404)
-        with server:
-            client = Client(server.uri)
-            self.assertRaises(PilosaServerError, client.create_index, self.index)
+        client = self.get_mock_client(404)
+        self.assertRaises(PilosaServerError, client.create_index, self.index)
 
     def test_server_warning(self):
         headers = [
             ("warning", '''299 pilosa/2.0 "Deprecated PQL version: PQL v2 will remove support for SetBit() in Pilosa 2.1. Please update your client to support Set() (See https://docs.pilosa.com/pql#versioning)." "Sat, 25 Aug 2019 23:34:45 GMT"''')
         ]
-        server = MockServer(200, headers=headers)
-        with server:
-            client = Client(server.uri)
-            client.query(self.field.row(1))
+        client = self.get_mock_client(200, headers=headers)
+        client.query(self.field.row(1))
 
     @classmethod
     def random_index_name(cls):
-        cls.counter += 1
-        return "testidx-%d" % cls.counter
+        return cls.index_name("testidx-%d" % next(_index_counter))
+
+    @classmethod
+    def index_name(cls, name):
+        """Returns an index name which is unique to this test process."""
+        if _WORKER_ID:
+            return "%s-%s" % (name, _WORKER_ID)
+        return name
+
+    @classmethod
+    def run_concurrently(cls, *calls):
+        """Runs the given functions in parallel and returns their results in order."""
+        pool = ThreadPool(len(calls))
+        try:
+            return pool.map(lambda call: call(), calls)
+        finally:
+            pool.close()
+            pool.join()
 
     @classmethod
     def get_client(cls):
-        server_address = cls.get_server_address()
-        return Client(server_address, tls_skip_verify=True)
+        return cls.client
 
     @classmethod
     def get_client_manual_address(cls):
-        server_address = cls.get_server_address()
-        return Client(server_address, tls_skip_verify=True, use_manual_address=True)
+        return cls.manual_address_client
+
+    @classmethod
+    def get_mock_client(cls, status=200, headers=None, content=b""):
+        client = Client()
+        # the client gets its responses from the mock pool manager, without a server
+        client._Client__client = MockPoolManager(status, headers, content)
+        return client
 
     @classmethod
     def get_server_address(cls):
-        import os
         server_address = os.environ.get("PILOSA_BIND", "")
         if not server_address:
             server_address = "http://:10101"
         return server_address
 
 
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """Handles each request in its own thread, so a slow request doesn't block the others."""
+
+    daemon_threads = True
+
+
 class MockServer(threading.Thread):
 
     def __init__(self, status=200, headers=None, content="", interpolate=False):
         super(MockServer, self).__init__()
-        self.stop_event = threading.Event()
+        self.server = None
         self.status = "%s STATUS" % status
         self.headers = headers or []
         self.content = content
+        self.body = None
         self.thread = None
-        self.host = "localhost"
+        # bind to the loopback address directly; "localhost" may resolve to IPv6 first
+        self.host = "127.0.0.1"
+        # 0 lets the OS pick a free port, the actual port is set after binding
         self.port = 0
         self.daemon = True
         self.interpolate = interpolate
 
     def __enter__(self):
-        import time
+        # the server is bound before the thread starts, so the port is known right away
+        self.server = make_server(self.host, self.port, self._app(), server_class=ThreadingWSGIServer)
+        self.port = self.server.server_address[1]
+        self.body = [self._encode_body()]
         self.start()
-        while self.port == 0:
-            # sleep a bit until finding out the actual port
-            time.sleep(1)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._stop()
-
-    def _stop(self):
-        self.stop_event.set()
-
-    def _stopped(self):
-        return self.stop_event.is_set()
+        self.stop()
+
+    def stop(self):
+        # wakes up serve_forever and waits until it returns;
+        # not named _stop, which would override a Thread internal
+        self.server.shutdown()
+
+    def _encode_body(self):
+        # the port is known after binding, so the body is built once here instead of for each request
+        content = self.content
+        if self.interpolate:
+            content = content % {
+                "SCHEME": "http",
+                "HOST": self.host,
+                "PORT": self.port,
+            }
+        if not isinstance(content, bytes):
+            # WSGI response bodies must be bytes
+            content = content.encode("utf-8")
+        return content
 
     def _app(self):
         def app(env, start_response):
             setup_testing_defaults(env)
             start_response(self.status, self.headers)
-            if self.interpolate:
-                return self.content % {
-                    "SCHEME": "http",
-                    "HOST": self.host,
-                    "PORT": self.port,
-                }
-            return self.content
+            return self.body
         return app
 
     @property
@@ -823,7 +906,7 @@ class MockServer(threading.Thread):
         return URI(host=self.host, port=self.port)
 
     def run(self):
-        server = make_server(self.host, self.port, self._app())
-        self.port = server.server_port
-        while not self._stopped():
-            server.handle_request()
+        try:
+            self.server.serve_forever(poll_interval=0.05)
+        finally:
+            self.server.server_close()
@@ -29,7 +29,7 @@ goto :end
     goto :end
 
 :test-all
-    py.test tests integration_tests
+    py.test -n auto tests integration_tests
     goto :end
 
 :end
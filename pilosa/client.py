@@ -31,15 +31,21 @@
 # DAMAGE.
 #
 
+import collections
 import io
 import json
 import logging
 import re
+import socket
 import sys
 import threading
+import time
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 
 import urllib3
+from google.protobuf.internal import api_implementation
+from urllib3.connection import HTTPConnection
 from opentracing.tracer import Tracer
 from roaring import Bitmap
 
@@ -57,6 +63,30 @@ __all__ = ("Client", "Cluster", "URI")
 _MAX_HOSTS = 10
 PQL_VERSION = "1.0"
 _IS_PY2 = sys.version_info.major == 2
+# time.monotonic is not available on Python 2
+_monotonic = getattr(time, "monotonic", time.time)
+_EMPTY_SCHEMA_CACHE = (0, None)
+# serializing import requests is much slower with the pure Python protobuf implementation
+_PURE_PYTHON_PROTOBUF = api_implementation.Type() == "python"
+# the warning about the pure Python protobuf implementation is logged only by the first import
+_protobuf_warning_logged = False
+# urllib3 already disables Nagle's algorithm with TCP_NODELAY;
+# TCP keep-alive also detects pooled connections which were silently dropped
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    # not available on all platforms
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60))
+
+# the request headers don't change, so they're built once;
+# urllib3 copies them before adding its own headers
+_PROTOBUF_HEADERS = {
+    "Content-Type": "application/x-protobuf",
+    "Accept": "application/x-protobuf",
+    "Accept-Encoding": "gzip",
+}
+_QUERY_HEADERS = dict(_PROTOBUF_HEADERS, **{"PQL-Version": PQL_VERSION})
+# ImportRoaringRequest.Clear (field 1, varint) set to true
+_ROARING_CLEAR_FIELD = b"\x08\x01"
 
 RESERVED_FIELDS = ("exists",)
 DEFAULT_SHARD_WIDTH = 1048576
@@ -98,7 +128,7 @@ class Client(object):
     def __init__(self, cluster_or_uri=None, connect_timeout=30000, socket_timeout=300000,
                  pool_size_per_route=10, pool_size_total=100, retry_count=3,
                  tls_skip_verify=False, tls_ca_certificate_path="", use_manual_address=False,
-                 tracer=None):
+                 tracer=None, schema_cache_ttl=0):
         """Creates a Client.
 
         :param object cluster_or_uri: A ``pilosa.Cluster`` or ``pilosa.URI` instance
@@ -113,6 +143,8 @@ class Client(object):
         :param str tls_ca_certificate_path: Server's TLS certificate (Useful when using self-signed certificates)
         :param bool use_manual_address: Forces the client to use only the manual server address
         :param opentracing.tracer.Tracer tracer: Set the OpenTracing tracer. See: https://opentracing.io
+        :param int schema_cache_ttl: The amount of time in milliseconds the schema loaded from the server is reused
+        by ``client.schema()``, and indexes and fields ensured by this client are assumed to exist. Disabled by default
 
         * See `Pilosa Python Client/Server Interaction <https://github.com/pilosa/python-pilosa/blob/master/docs/server-interaction.md>`_.
         """
@@ -124,11 +156,19 @@ class Client(object):
         self.retry_count = retry_count
         self.tls_skip_verify = tls_skip_verify
         self.tls_ca_certificate_path = tls_ca_certificate_path
+        self.schema_cache_ttl = schema_cache_ttl
+        self.__schema_cache = _EMPTY_SCHEMA_CACHE
+        # (index name, field name or None) => expiry time
+        self.__known_schema = {}
         self.__current_host = None
         self.__client = None
+        self.__connect_lock = threading.Lock()
         self.logger = logging.getLogger("pilosa")
         self.__coordinator_lock = threading.RLock()
-        self.__coordinator_uri = None
+        self.__coordinator_node = None
+        # node URL => client which imports to that node
+        self.__node_clients = {}
+        self.__node_clients_lock = threading.Lock()
         self.tracer = tracer or Tracer()
 
         if cluster_or_uri is None:
@@ -137,14 +177,12 @@ class Client(object):
             self.cluster = cluster_or_uri.copy()
         elif isinstance(cluster_or_uri, URI):
             if use_manual_address:
-                self.__coordinator_uri = cluster_or_uri
                 self.__current_host = cluster_or_uri
             else:
                 self.cluster = Cluster(cluster_or_uri)
         elif isinstance(cluster_or_uri, str):
             uri = URI.address(cluster_or_uri)
             if use_manual_address:
-                self.__coordinator_uri = uri
                 self.__current_host = uri
             else:
                 self.cluster = Cluster(uri)
@@ -171,14 +209,9 @@ class Client(object):
         path = "/index/%s/query" % query.index.name
         with self.tracer.start_span("Client.Query") as span:
             try:
-                headers = {
-                    "Content-Type": "application/x-protobuf",
-                    "Accept": "application/x-protobuf",
-                    "PQL-Version": PQL_VERSION,
-                }
                 response = self.__http_request("POST", path,
                                                 data=request.to_protobuf(),
-                                                headers=headers,
+                                                headers=_QUERY_HEADERS,
                                                 use_coordinator=serialized_query.has_keys)
                 warning = response.getheader("warning")
                 if warning:
@@ -200,8 +233,13 @@ class Client(object):
                 self.__http_request("POST", path, data=data)
             except PilosaServerError as e:
                 if e.response.status == 409:
+                    self.__remember_schema(index.name)
                     raise IndexExistsError
                 raise
+            else:
+                self.__remember_schema(index.name)
+            finally:
+                self.__invalidate_schema_cache()
 
     def delete_index(self, index):
         """Deletes the given index on the server.
@@ -211,7 +249,11 @@ class Client(object):
         """
         path = "/index/%s" % index.name
         with self.tracer.start_span("Client.DeleteIndex") as scope:
-            self.__http_request("DELETE", path)
+            try:
+                self.__http_request("DELETE", path)
+            finally:
+                self.__invalidate_schema_cache()
+                self.__forget_schema(index.name)
 
     def create_field(self, field):
         """Creates a field on the server using the given Field object.
@@ -226,8 +268,13 @@ class Client(object):
                 self.__http_request("POST", path, data=data)
             except PilosaServerError as e:
                 if e.response.status == 409:
+                    self.__remember_schema(field.index.name, field.name)
                     raise FieldExistsError
                 raise
+            else:
+                self.__remember_schema(field.index.name, field.name)
+            finally:
+                self.__invalidate_schema_cache()
 
 
     def delete_field(self, field):
@@ -238,13 +285,19 @@ class Client(object):
         """
         path = "/index/%s/field/%s" % (field.index.name, field.name)
         with self.tracer.start_span("Client.DeleteField") as scope:
-            self.__http_request("DELETE", path)
+            try:
+                self.__http_request("DELETE", path)
+            finally:
+                self.__invalidate_schema_cache()
+                self.__forget_schema(field.index.name, field.name)
 
     def ensure_index(self, index):
         """Creates an index on the server if it does not exist.
 
         :param pilosa.Index index:
         """
+        if self.__is_known_schema(index.name):
+            return
         try:
             self.create_index(index)
         except IndexExistsError:
@@ -255,6 +308,8 @@ class Client(object):
 
         :param pilosa.Field field:
         """
+        if self.__is_known_schema(field.index.name, field.name):
+            return
         try:
             self.create_field(field)
         except FieldExistsError:
@@ -264,6 +319,34 @@ class Client(object):
         response = self.__http_request("GET", "/schema")
         return json.loads(response.data.decode('utf-8')).get("indexes") or []
 
+    def __read_cached_schema(self):
+        if self.schema_cache_ttl <= 0:
+            return self._read_schema()
+        expires, index_infos = self.__schema_cache
+        if index_infos is None or _monotonic() >= expires:
+            index_infos = self._read_schema()
+            self.__schema_cache = (_monotonic() + self.schema_cache_ttl / 1000.0, index_infos)
+        return index_infos
+
+    def __invalidate_schema_cache(self):
+        self.__schema_cache = _EMPTY_SCHEMA_CACHE
+
+    def __is_known_schema(self, index_name, field_name=None):
+        expires = self.__known_schema.get((index_name, field_name))
+        return expires is not None and _monotonic() < expires
+
+    def __remember_schema(self, index_name, field_name=None):
+        if self.schema_cache_ttl > 0:
+            self.__known_schema[(index_name, field_name)] = _monotonic() + self.schema_cache_ttl / 1000.0
+
+    def __forget_schema(self, index_name, field_name=None):
+        if field_name is not None:
+            self.__known_schema.pop((index_name, field_name), None)
+        else:
+            # deleting an index deletes its fields too
+            self.__known_schema = dict((key, expires) for key, expires in self.__known_schema.items()
+                                       if key[0] != index_name)
+
     def schema(self):
         """Loads the schema from the server.
 
@@ -272,7 +355,7 @@ class Client(object):
         """
         schema = Schema()
         with self.tracer.start_span("Client.Schema") as scope:
-            for index_info in self._read_schema():
+            for index_info in self.__read_cached_schema():
                 index_options = index_info.get("options", {})
                 index = schema.index(index_info["name"],
                                      keys=index_options.get("keys", False),
@@ -317,7 +400,7 @@ class Client(object):
                         if field_name not in RESERVED_FIELDS:
                             local_index._fields[field_name] = field
 
-    def import_field(self, field, bit_reader, batch_size=100000, fast_import=False, clear=False):
+    def import_field(self, field, bit_reader, batch_size=100000, fast_import=False, clear=False, thread_count=1):
         """Imports a field using the given bit reader
 
         :param pilosa.Field field: The field to import into
@@ -325,11 +408,39 @@ class Client(object):
         :param int batch_size: Number of bits to read from the bit reader before posting them to the server
         :param bool fast_import: Enables fast import for data with columnID/rowID bits
         :param clear: clear bits instead of setting them
+        :param int thread_count: Number of batches to post to the server at the same time.
+        Batches may be imported out of order if greater than 1, so it shouldn't be used with
+        mutex and int fields when the same column appears in more than one batch
         """
+        global _protobuf_warning_logged
+        if _PURE_PYTHON_PROTOBUF and not _protobuf_warning_logged:
+            _protobuf_warning_logged = True
+            self.logger.warning("The pure Python protobuf implementation is in use, imports will be slow. "
+                                "See: https://github.com/pilosa/python-pilosa/blob/master/docs/imports.md")
         shard_width = field.index.shard_width or DEFAULT_SHARD_WIDTH
         with self.tracer.start_span("Client.ImportField") as scope:
-            for shard, columns in batch_columns(bit_reader, batch_size, shard_width):
-                self._import_data(field, shard, columns, fast_import, clear)
+            shard_batches = batch_columns(bit_reader, batch_size, shard_width)
+            if thread_count > 1:
+                self.__import_concurrently(field, shard_batches, fast_import, clear, thread_count)
+            else:
+                for shard, columns in shard_batches:
+                    self._import_data(field, shard, columns, fast_import, clear)
+
+    def __import_concurrently(self, field, shard_batches, fast_import, clear, thread_count):
+        pool = ThreadPool(thread_count)
+        try:
+            pending = collections.deque()
+            for shard, columns in shard_batches:
+                # at most thread_count batches are read ahead of the server
+                if len(pending) >= thread_count:
+                    pending.popleft().get()
+                pending.append(pool.apply_async(self._import_data, (field, shard, columns, fast_import, clear)))
+            # get re-raises the exception of a failed import
+            for result in pending:
+                result.get()
+        finally:
+            pool.close()
+            pool.join()
 
     def http_request(self, method, path, data=None, headers=None):
         """Sends an HTTP request to the Pilosa server
@@ -348,37 +459,72 @@ class Client(object):
             return self.__http_request(method, path, data=data, headers=headers)
 
     def _import_data(self, field, shard, data, fast_import, clear):
-        if field.field_type != "int":
-            # sort by row_id then by column_id
-            if not field.index.keys:
-                data.sort(key=lambda col: (col.row_id, col.column_id))
+        use_coordinator = False
         if self.use_manual_address:
             nodes = [_Node.from_uri(self.__current_host)]
         else:
             if field.index.keys or field.keys:
-                nodes = [self._fetch_coordinator_node()]
+                use_coordinator = True
+                nodes = [self.__get_coordinator_node()]
             else:
                 nodes = self._fetch_fragment_nodes(field.index.name, shard)
-        # copy client params
-        client_params = {}
-        for k,v in self.__dict__.items():
-            # don't copy protected, private params
-            if k.startswith("_"):
-                continue
-            # don't copy these
-            if k in ["cluster", "logger"]:
-                continue
-            client_params[k] = v
+        if field.field_type == "int":
+            req = _ImportValueRequest(field, shard, data)
+            fast_import = False
+        else:
+            req = _ImportRequest(field, shard, data)
+            fast_import = fast_import and field.field_type in ["set", "bool", "time"] and \
+                req.format == csv_row_id_column_id
+            # roaring imports sort the bit positions themselves, which is cheaper than sorting the columns
+            if not fast_import and not field.index.keys:
+                # sort by row_id then by column_id
+                data.sort(key=lambda col: (col.row_id, col.column_id))
+        # the request is serialized once, then sent to each node which holds the shard
+        payload = req.to_bitmap(clear) if fast_import else req.to_protobuf()
         for node in nodes:
-            client = Client(URI.address(node.url), **client_params)
-            if field.field_type == "int":
-                client._import_node(_ImportValueRequest(field, shard, data), clear)
-            else:
-                req = _ImportRequest(field, shard, data)
-                if fast_import and field.field_type in ["set", "bool", "time"] and req.format == csv_row_id_column_id:
-                    client._import_node_fast(req, clear)
+            client = self.__get_node_client(node)
+            try:
+                if fast_import:
+                    client._import_node_fast(req, payload)
                 else:
-                    client._import_node(req, clear)
+                    client._import_node(req, payload, clear)
+            except PilosaError:
+                # the node client removes the node from its cluster on failure, which leaves it without hosts;
+                # drop it, so the next import to the node uses a new one
+                with self.__node_clients_lock:
+                    if self.__node_clients.get(node.url) is client:
+                        del self.__node_clients[node.url]
+                if use_coordinator:
+                    # the coordinator may have changed, fetch it again for the next import
+                    self.__coordinator_node = None
+                raise
+
+    def __get_node_client(self, node):
+        # node clients are kept, so their connections are reused by the following imports
+        client = self.__node_clients.get(node.url)
+        if client is not None:
+            return client
+        with self.__node_clients_lock:
+            client = self.__node_clients.get(node.url)
+            if client is None:
+                client = Client(URI.address(node.url),
+                                connect_timeout=self.connect_timeout,
+                                socket_timeout=self.socket_timeout,
+                                pool_size_per_route=self.pool_size_per_route,
+                                pool_size_total=self.pool_size_total,
+                                retry_count=self.retry_count,
+                                tls_skip_verify=self.tls_skip_verify,
+                                tls_ca_certificate_path=self.tls_ca_certificate_path,
+                                use_manual_address=self.use_manual_address,
+                                tracer=self.tracer,
+                                schema_cache_ttl=self.schema_cache_ttl)
+                # the pool manager keeps a connection pool per host, so the node clients
+                # share it with this client instead of creating their own
+                if self.__client is None:
+                    self.__connect()
+                client.__client = self.__client
+                self.__node_clients[node.url] = client
+        return client
 
     def _fetch_fragment_nodes(self, index_name, shard):
         path = "/internal/fragment/nodes?shard=%d&index=%s" % (shard, index_name)
@@ -401,38 +547,25 @@ class Client(object):
                 return _Node(uri["scheme"], uri["host"], uri["port"])
         raise PilosaServerError(response)
 
-    def _import_node(self, import_request, clear):
-        data = import_request.to_protobuf()
-        headers = {
-            'Content-Type': 'application/x-protobuf',
-            'Accept': 'application/x-protobuf',
-        }
+    def _import_node(self, import_request, data, clear):
         clear_str = "?clear=true" if clear else ""
         path = "/index/%s/field/%s/import%s" % (import_request.index_name, import_request.field_name, clear_str)
-        self.__http_request("POST", path, data=data, headers=headers)
+        self.__http_request("POST", path, data=data, headers=_PROTOBUF_HEADERS)
 
-    def _import_node_fast(self, import_request, clear):
-        data = import_request.to_bitmap(clear)
-        headers = {
-            'Content-Type': 'application/x-protobuf',
-            'Accept': 'application/x-protobuf',
-        }
+    def _import_node_fast(self, import_request, data):
         path = "/index/%s/field/%s/import-roaring/%d" % \
                (import_request.index_name, import_request.field_name, import_request.shard)
-        self.__http_request("POST", path, data=data, headers=headers)
+        self.__http_request("POST", path, data=data, headers=_PROTOBUF_HEADERS)
 
     def __http_request(self, method, path, data=None, headers=None, use_coordinator=False):
-        if not self.__client:
+        if self.__client is None:
             self.__connect()
         # try at most 10 non-failed hosts; protect against broken cluster.remove_host
         for _ in range(_MAX_HOSTS):
-            uri = ""
-            if use_coordinator:
-                with self.__coordinator_lock:
-                    if self.__coordinator_uri is None:
-                        node = self._fetch_coordinator_node()
-                        uri = "%s://%s:%s%s" % (node.scheme, node.host, node.port, path)
-                        self.__coordinator_uri = uri
+            # the manual address is used for the requests to the coordinator too
+            use_coordinator_node = use_coordinator and not self.use_manual_address
+            if use_coordinator_node:
+                uri = "%s%s" % (self.__get_coordinator_node().url, path)
             else:
                 uri = "%s%s" % (self.__get_address(), path)
             try:
@@ -441,9 +574,9 @@ class Client(object):
                 break
             except urllib3.exceptions.MaxRetryError as e:
                 if not self.use_manual_address:
-                    if use_coordinator:
-                        self.__coordinator_uri = None
-                        self.logger.warning("Removed coordinator %s due to %s", self.__coordinator_uri, str(e))
+                    if use_coordinator_node:
+                        self.__coordinator_node = None
+                        self.logger.warning("Removed coordinator %s due to %s", uri, str(e))
                     else:
                         self.cluster.remove_host(self.__current_host)
                         self.logger.warning("Removed %s from the cluster due to %s", self.__current_host, str(e))
@@ -453,8 +586,18 @@ class Client(object):
 
         if 200 <= response.status < 300:
             return response
+        if use_coordinator_node:
+            # the node may not be the coordinator anymore, fetch it again for the next request
+            self.__coordinator_node = None
         raise PilosaServerError(response)
 
+    def __get_coordinator_node(self):
+        # the coordinator node is fetched once and reused until a request to it fails
+        with self.__coordinator_lock:
+            if self.__coordinator_node is None:
+                self.__coordinator_node = self._fetch_coordinator_node()
+            return self.__coordinator_node
+
     def __get_address(self):
         if self.__current_host is None:
             self.__current_host = self.cluster.get_host()
@@ -462,9 +605,18 @@ class Client(object):
         return self.__current_host._normalize()
 
     def __connect(self):
+        # concurrent callers must share a single pool manager, so that their
+        # requests are spread over the same set of keep-alive connections
+        with self.__connect_lock:
+            if self.__client is None:
+                self.__client = self.__create_pool_manager()
+
+    def __create_pool_manager(self):
         num_pools = float(self.pool_size_total) / self.pool_size_per_route
+        # urllib3 decompresses gzip encoded responses
         headers = {
             'User-Agent': 'python-pilosa/%s' % VERSION,
+            'Accept-Encoding': 'gzip',
         }
 
         connect_timeout_in_seconds = self.connect_timeout / 1000.0
@@ -477,13 +629,13 @@ class Client(object):
             "headers": headers,
             "timeout": timeout,
             "retries": self.retry_count,
+            "socket_options": _SOCKET_OPTIONS,
         }
         if not self.tls_skip_verify:
             client_options["cert_reqs"] = "CERT_REQUIRED"
             client_options["ca_certs"] = self.tls_ca_certificate_path
 
-        client = urllib3.PoolManager(**client_options)
-        self.__client = client
+        return urllib3.PoolManager(**client_options)
 
 
 def decode_field_meta_options(field_info):
@@ -693,29 +845,24 @@ class _ImportRequest:
         column_keys = request.ColumnKeys
         timestamps = request.Timestamps
 
+        # a single extend per repeated field is much faster than appending each value
+        columns = self.columns
         row_format = self.format
         if row_format == csv_row_id_column_id:
-            for bit in self.columns:
-                row_ids.append(bit.row_id)
-                column_ids.append(bit.column_id)
-                timestamps.append(bit.timestamp)
+            row_ids.extend([bit.row_id for bit in columns])
+            column_ids.extend([bit.column_id for bit in columns])
         elif row_format == csv_row_id_column_key:
-            for bit in self.columns:
-                row_ids.append(bit.row_id)
-                column_keys.append(bit.column_key)
-                timestamps.append(bit.timestamp)
+            row_ids.extend([bit.row_id for bit in columns])
+            column_keys.extend([bit.column_key for bit in columns])
         elif row_format == csv_row_key_column_id:
-            for bit in self.columns:
-                row_keys.append(bit.row_key)
-                column_ids.append(bit.column_id)
-                timestamps.append(bit.timestamp)
+            row_keys.extend([bit.row_key for bit in columns])
+            column_ids.extend([bit.column_id for bit in columns])
         elif row_format == csv_row_key_column_key:
-            for bit in self.columns:
-                row_keys.append(bit.row_key)
-                column_keys.append(bit.column_key)
-                timestamps.append(bit.timestamp)
+            row_keys.extend([bit.row_key for bit in columns])
+            column_keys.extend([bit.column_key for bit in columns])
         else:
             raise PilosaError("Invalid import format")
+        timestamps.extend([bit.timestamp for bit in columns])
 
         return bytearray(request.SerializeToString()) if return_bytearray else request.SerializeToString()
 
@@ -728,30 +875,40 @@ class _ImportRequest:
         return bytearray(data) if return_bytearray else data
 
     def _field_set_to_roaring(self, shard_width, clear):
-        bitmap = Bitmap()
-        for b in self.columns:
-            bitmap.add(b.row_id * shard_width + b.column_id % shard_width)
-        bitmaps = {"": bitmap}
+        bits = [b.row_id * shard_width + b.column_id % shard_width for b in self.columns]
+        bitmaps = {"": self._bits_to_bitmap(bits)}
         return self._make_roaring_request(bitmaps, clear)
 
     def _field_time_to_roaring(self, shard_width, clear):
-        standard = Bitmap()
-        bitmaps = {"": standard}
-        time_quantum = self.field_time_quantum
-        time_formats = self._time_formats
+        # the finest time quantum is an hour, so all bits in the same hour
+        # belong to the same views and the view names are formatted once per hour
+        bits = []
+        hour_bits = {}
         for b in self.columns:
             bit = b.row_id * shard_width + b.column_id % shard_width
-            standard.add(bit)
-            for c in time_quantum:
-                fmt = time_formats.get(c, "")
-                view_name = datetime.utcfromtimestamp(b.timestamp).strftime(fmt)
-                bmp = bitmaps.get(view_name)
-                if not bmp:
-                    bmp = Bitmap()
-                    bitmaps[view_name] = bmp
-                bmp.add(bit)
+            bits.append(bit)
+            hour_bits.setdefault(b.timestamp // 3600, []).append(bit)
+        view_bits = {"": bits}
+        time_formats = self._time_formats
+        formats = [time_formats.get(c, "") for c in self.field_time_quantum]
+        for hour, bits_in_hour in hour_bits.items():
+            hour_start = datetime.utcfromtimestamp(hour * 3600)
+            for fmt in formats:
+                view_bits.setdefault(hour_start.strftime(fmt), []).extend(bits_in_hour)
+        bitmaps = dict((name, self._bits_to_bitmap(bits)) for name, bits in view_bits.items())
         return self._make_roaring_request(bitmaps, clear)
 
+    @staticmethod
+    def _bits_to_bitmap(bits):
+        # adding the bits in order lets the bitmap reuse its last container
+        # instead of searching for the container of each bit
+        bits.sort()
+        bitmap = Bitmap()
+        add = bitmap.add
+        for bit in bits:
+            add(bit)
+        return bitmap
+
     def _make_roaring_request(self, bitmaps, clear):
         req = internal.ImportRoaringRequest()
         for name, bitmap in bitmaps.items():
@@ -760,8 +917,12 @@ class _ImportRequest:
             view = req.views.add()
             view.Name = name
             view.Data = bio.getvalue()
-        req.Clear = clear
-        return req.SerializeToString()
+        data = req.SerializeToString()
+        if clear:
+            # the Clear field is shadowed by the Clear method of protobuf messages, so it can't be set;
+            # a serialized field appended to a message is merged into it
+            data += _ROARING_CLEAR_FIELD
+        return data
 
 
 class _ImportValueRequest:
@@ -782,16 +943,14 @@ class _ImportValueRequest:
         column_keys = request.ColumnKeys
         values = request.Values
 
+        field_values = self.field_values
         if self.format == csv_column_id_value:
-            for field_value in self.field_values:
-                column_ids.append(field_value.column_id)
-                values.append(field_value.value)
+            column_ids.extend([field_value.column_id for field_value in field_values])
         elif self.format == csv_column_key_value:
-            for field_value in self.field_values:
-                column_keys.append(field_value.column_key)
-                values.append(field_value.value)
+            column_keys.extend([field_value.column_key for field_value in field_values])
         else:
             raise PilosaError("Invalid import format")
+        values.extend([field_value.value for field_value in field_values])
 
         return bytearray(request.SerializeToString()) if return_bytearray else request.SerializeToString()
 
@@ -38,7 +38,9 @@ from pilosa.exceptions import PilosaError
 __all__ = ("Column", "csv_column_reader")
 
 
-class Column:
+class Column(object):
+
+    __slots__ = "row_id", "column_id", "row_key", "column_key", "timestamp"
 
     def __init__(self, row_id=0, column_id=0, row_key="", column_key="", timestamp=0):
         self.row_id = row_id
@@ -71,7 +73,9 @@ class Column:
             (self.row_id, self.column_id, self.row_key, self.column_key, self.timestamp)
 
 
-class FieldValue:
+class FieldValue(object):
+
+    __slots__ = "column_id", "column_key", "value"
 
     def __init__(self, column_id=0, column_key="", value=0):
         self.column_id = column_id
@@ -101,28 +105,31 @@ class FieldValue:
             (self.column_id, self.value)
 
 
+# the format functions run once per line; they pass the values positionally,
+# which is about twice as fast as passing them as keyword arguments
+
 def csv_row_id_column_id(parts, timestamp):
-    return Column(row_id=int(parts[0]), column_id=int(parts[1]), timestamp=timestamp)
+    return Column(int(parts[0]), int(parts[1]), "", "", timestamp)
 
 
 def csv_row_id_column_key(parts, timestamp):
-    return Column(row_id=int(parts[0]), column_key=parts[1], timestamp=timestamp)
+    return Column(int(parts[0]), 0, "", parts[1], timestamp)
 
 
 def csv_row_key_column_id(parts, timestamp):
-    return Column(row_key=parts[0], column_id=int(parts[1]), timestamp=timestamp)
+    return Column(0, int(parts[1]), parts[0], "", timestamp)
 
 
 def csv_row_key_column_key(parts, timestamp):
-    return Column(row_key=parts[0], column_key=parts[1], timestamp=timestamp)
+    return Column(0, 0, parts[0], parts[1], timestamp)
 
 
 def csv_column_id_value(parts, timestamp):
-    return FieldValue(column_id=int(parts[0]), value=int(parts[1]))
+    return FieldValue(int(parts[0]), "", int(parts[1]))
 
 
 def csv_column_key_value(parts, timestamp):
-    return FieldValue(column_key=parts[0], value=int(parts[1]))
+    return FieldValue(0, parts[0], int(parts[1]))
 
 
 def csv_column_reader(file_obj, timefunc=int, formatfunc=csv_row_id_column_id):
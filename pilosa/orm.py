@@ -165,9 +165,10 @@ class Schema:
             else:
                 # the index exists in the other schema; check the fields
                 result_index = index.copy(fields=False)
+                other_fields = other._indexes[index_name]._fields
                 for field_name, field in index._fields.items():
                     # if the field doesn't exist in the other scheme, copy it
-                    if field_name not in result_index._fields:
+                    if field_name not in other_fields:
                         result_index._fields[field_name] = field.copy()
                 # check whether we modified result index
                 if len(result_index._fields) > 0:
@@ -57,7 +57,8 @@ class RowResult:
 
     @classmethod
     def from_internal(cls, obj):
-        return cls(list(obj.Columns), obj.Keys, _convert_protobuf_attrs_to_dict(obj.Attrs))
+        # copied to lists, so the results don't keep the whole protobuf message alive
+        return cls(list(obj.Columns), list(obj.Keys), _convert_protobuf_attrs_to_dict(obj.Attrs))
 
 
 class CountResultItem:
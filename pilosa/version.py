@@ -39,19 +39,19 @@ import pkg_resources
 DEFAULT_VERSION = '0.0.0-unversioned'
 
 
-def _git_version():
+def _git_version(check_output=subprocess.check_output):
     try:
         path = os.path.dirname(os.path.abspath(__file__))
-        return subprocess.check_output(
+        return check_output(
             ['git', '-C', path, 'describe', '--tags']
             ).strip().decode(encoding='utf-8', errors='ignore')
     except (OSError, AttributeError, subprocess.CalledProcessError):
         return None
 
 
-def _installed_version():
+def _installed_version(require=pkg_resources.require):
     try:
-        return pkg_resources.require('pilosa')[0].version
+        return require('pilosa')[0].version
     except pkg_resources.DistributionNotFound:
         return None
 
@@ -63,11 +63,11 @@ def get_version():
     return _installed_version() or _git_version() or DEFAULT_VERSION
 
 
-def _get_version_setup():
+def _get_version_setup(check_output=subprocess.check_output, require=pkg_resources.require):
     """
     Returns the version for setup.py
     """
-    return _git_version() or _installed_version() or DEFAULT_VERSION
+    return _git_version(check_output) or _installed_version(require) or DEFAULT_VERSION
 
 
 VERSION = get_version()
@@ -0,0 +1,85 @@
+# Copyright 2017 Pilosa Corp.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived
+# from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+#
+
+import io
+import threading
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    # python 2.7
+    from urlparse import urlsplit
+
+import urllib3
+
+__all__ = ("MockPoolManager",)
+
+
+class MockPoolManager(object):
+    """Replaces the urllib3 pool manager of a client, so the client can be tested without a server.
+
+    Requests are recorded as (method, path, body) tuples. The responses set with ``respond`` for a path are
+    returned in order, the last one is repeated. Other paths get the default response.
+    """
+
+    def __init__(self, status=200, headers=None, content=b""):
+        self.default_response = (status, headers, content)
+        self.requests = []
+        self.hosts = []
+        self.__responses = {}
+        self.__lock = threading.Lock()
+
+    def respond(self, path, status=200, headers=None, content=b"", error=None):
+        """Adds a response for the given path. If ``error`` is set, it is raised instead."""
+        self.__responses.setdefault(path, []).append((status, headers, content, error))
+
+    def request(self, method, url, body=None, headers=None):
+        parts = urlsplit(url)
+        path = "%s?%s" % (parts.path, parts.query) if parts.query else parts.path
+        with self.__lock:
+            self.requests.append((method, path, body))
+            self.hosts.append(parts.netloc)
+            responses = self.__responses.get(path)
+            if responses:
+                status, headers, content, error = responses.pop(0) if len(responses) > 1 else responses[0]
+                if error is not None:
+                    raise error
+            else:
+                status, headers, content = self.default_response
+        # the body is read from a file object, so an empty body is b"" rather than None
+        return urllib3.HTTPResponse(body=io.BytesIO(content), headers=dict(headers or []), status=status,
+                                    preload_content=False)
+
+    def paths(self, method=None):
+        """Returns the paths of the recorded requests, optionally only the ones with the given method."""
+        return [path for m, path, _ in self.requests if method is None or m == method]
@@ -31,15 +31,25 @@
 # DAMAGE.
 #
 
+import io
+import json
 import logging
+import threading
+import time
 import unittest
 
+import urllib3
+from roaring import Bitmap
+
+import pilosa.client
 import pilosa.internal.public_pb2 as internal
 from pilosa import TimeQuantum, CacheType
 from pilosa.client import Client, URI, Cluster, _QueryRequest, \
     decode_field_meta_options, _ImportRequest, _ImportValueRequest, _Node
-from pilosa.exceptions import PilosaURIError, PilosaError
+from pilosa.exceptions import PilosaURIError, PilosaError, IndexExistsError, FieldExistsError
 from pilosa.imports import Column, FieldValue
+from pilosa.orm import Schema
+from tests.mock_pool_manager import MockPoolManager
 
 logger = logging.getLogger(__name__)
 
@@ -49,13 +59,13 @@ class ClientTestCase(unittest.TestCase):
     def test_create_client(self):
         # create default client
         c = Client()
-        self.assertEquals(URI(), c.cluster.hosts[0][0])
+        self.assertEqual(URI(), c.cluster.hosts[0][0])
         # create with cluster
         c = Client(Cluster(URI.address(":15000")))
-        self.assertEquals(URI.address(":15000"), c.cluster.hosts[0][0])
+        self.assertEqual(URI.address(":15000"), c.cluster.hosts[0][0])
         # create with URI
         c = Client(URI.address(":20000"))
-        self.assertEquals(URI.address(":20000"), c.cluster.hosts[0][0])
+        self.assertEqual(URI.address(":20000"), c.cluster.hosts[0][0])
         # create with invalid type
         self.assertRaises(PilosaError, Client, 15000)
 
@@ -69,23 +79,38 @@ class ClientTestCase(unittest.TestCase):
             "int_min": 0,
             "int_max": 0,
         }
-        self.assertEquals(target, options)
-
-    def test_timeout_stay_same_after_recreate(self):
-        prev_client = Client()
-        client_params = {}
-        for k, v in prev_client.__dict__.items():
-            # don't copy protected, private params
-            if k.startswith("_"):
-                continue
-            # don't copy these
-            if k in ["cluster", "logger"]:
-                continue
-            client_params[k] = v
-
-        new_client = Client(**client_params)
-        self.assertEquals(prev_client.connect_timeout, new_client.connect_timeout)
-        self.assertEquals(prev_client.socket_timeout, new_client.socket_timeout)
+        self.assertEqual(target, options)
+
+    def test_node_client_options(self):
+        client = Client(connect_timeout=1000, socket_timeout=2000, retry_count=5,
+                        tls_skip_verify=True, tls_ca_certificate_path="/tmp/ca.crt")
+        pool_manager = client._Client__client = MockPoolManager()
+        node_client = client._Client__get_node_client(_Node("https", "node0", 10101))
+        self.assertEqual(1000, node_client.connect_timeout)
+        self.assertEqual(2000, node_client.socket_timeout)
+        self.assertEqual(5, node_client.retry_count)
+        self.assertEqual(True, node_client.tls_skip_verify)
+        self.assertEqual("/tmp/ca.crt", node_client.tls_ca_certificate_path)
+        self.assertIs(pool_manager, node_client._Client__client)
+        self.assertEqual(URI.address("https://node0:10101"), node_client.cluster.hosts[0][0])
+
+    def test_concurrent_connect_shares_pool_manager(self):
+        client = Client()
+        create_pool_manager = client._Client__create_pool_manager
+        created = []
+
+        def counting_create_pool_manager():
+            created.append(create_pool_manager())
+            return created[-1]
+
+        client._Client__create_pool_manager = counting_create_pool_manager
+        threads = [threading.Thread(target=client._Client__connect) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(created))
+        self.assertIs(created[0], client._Client__client)
 
 
 class URITestCase(unittest.TestCase):
@@ -128,10 +153,10 @@ class URITestCase(unittest.TestCase):
 
     def test_normalized_address(self):
         uri = URI.address("https+pb://big-data.pilosa.com:6888")
-        self.assertEquals("https://big-data.pilosa.com:6888", uri._normalize())
+        self.assertEqual("https://big-data.pilosa.com:6888", uri._normalize())
 
         uri = URI.address("https://big-data.pilosa.com:6888")
-        self.assertEquals("https://big-data.pilosa.com:6888", uri._normalize())
+        self.assertEqual("https://big-data.pilosa.com:6888", uri._normalize())
 
     def test_invalid_address(self):
         for address in ["foo:bar", "http://foo:", "http://foo:", "foo:", ":bar", "fd42:4201:f86b:7e09:216:3eff:fefa:ed80"]:
@@ -147,14 +172,14 @@ class URITestCase(unittest.TestCase):
         ]
         for address, scheme, host, port in addresses:
             uri = URI.address(address)
-            self.assertEquals(scheme, uri.scheme)
-            self.assertEquals(host, uri.host)
-            self.assertEquals(port, uri.port)
+            self.assertEqual(scheme, uri.scheme)
+            self.assertEqual(host, uri.host)
+            self.assertEqual(port, uri.port)
 
 
     def test_to_string(self):
         uri = URI()
-        self.assertEquals("http://localhost:10101", "%s" % uri)
+        self.assertEqual("http://localhost:10101", "%s" % uri)
 
     def test_equals(self):
         uri1 = URI(host="pilosa.com", port=1337)
@@ -166,16 +191,16 @@ class URITestCase(unittest.TestCase):
 
     def test_equals_same_object(self):
         uri = URI.address("https://pilosa.com:1337")
-        self.assertEquals(uri, uri)
+        self.assertEqual(uri, uri)
 
     def test_repr(self):
         uri = URI.address("https://pilosa.com:1337")
-        self.assertEquals("<URI https://pilosa.com:1337>", repr(uri))
+        self.assertEqual("<URI https://pilosa.com:1337>", repr(uri))
 
     def compare(self, uri, scheme, host, port):
-        self.assertEquals(scheme, uri.scheme)
-        self.assertEquals(host, uri.host)
-        self.assertEquals(port, uri.port)
+        self.assertEqual(scheme, uri.scheme)
+        self.assertEqual(host, uri.host)
+        self.assertEqual(port, uri.port)
 
 
 class ClusterTestCase(unittest.TestCase):
@@ -183,7 +208,7 @@ class ClusterTestCase(unittest.TestCase):
     def test_create_with_host(self):
         target = [(URI.address("http://localhost:3000"), True)]
         c = Cluster(URI.address("http://localhost:3000"))
-        self.assertEquals(target, c.hosts)
+        self.assertEqual(target, c.hosts)
 
     def test_add_remove_host(self):
         target = [(URI.address("http://localhost:3000"), True)]
@@ -191,13 +216,13 @@ class ClusterTestCase(unittest.TestCase):
         c.add_host(URI.address("http://localhost:3000"))
         # add the same host, the list of hosts should be the same
         c.add_host(URI.address("http://localhost:3000"))
-        self.assertEquals(target, c.hosts)
+        self.assertEqual(target, c.hosts)
         target = [(URI.address("http://localhost:3000"), True), (URI(), True)]
         c.add_host(URI())
-        self.assertEquals(target, c.hosts)
+        self.assertEqual(target, c.hosts)
         target = [(URI.address("http://localhost:3000"), False), (URI(), True)]
         c.remove_host(URI.address("http://localhost:3000"))
-        self.assertEquals(target, c.hosts)
+        self.assertEqual(target, c.hosts)
 
     def test_get_host(self):
         target1 = URI.address("db1.pilosa.com")
@@ -207,13 +232,13 @@ class ClusterTestCase(unittest.TestCase):
         c.add_host(URI.address("db1.pilosa.com"))
         c.add_host(URI.address("db2.pilosa.com"))
         addr = c.get_host()
-        self.assertEquals(target1, addr)
+        self.assertEqual(target1, addr)
         addr = c.get_host()
-        self.assertEquals(target1, addr)
+        self.assertEqual(target1, addr)
         c.get_host()
         c.remove_host(URI.address("db1.pilosa.com"))
         addr = c.get_host()
-        self.assertEquals(target2, addr)
+        self.assertEqual(target2, addr)
 
     def test_get_host_when_no_hosts(self):
         c = Cluster()
@@ -240,8 +265,8 @@ class QueryRequestTestCase(unittest.TestCase):
         self.assertIsNotNone(bin)
         qr = internal.QueryRequest()
         qr.ParseFromString(bin)
-        self.assertEquals("Row(field='foo', id=1)", qr.Query)
-        self.assertEquals(True, qr.ColumnAttrs)
+        self.assertEqual("Row(field='foo', id=1)", qr.Query)
+        self.assertEqual(True, qr.ColumnAttrs)
 
 
 class ImportRequestTestCase(unittest.TestCase):
@@ -253,13 +278,13 @@ class ImportRequestTestCase(unittest.TestCase):
         self.assertIsNotNone(bin)
         ir = internal.ImportRequest()
         ir.ParseFromString(bin)
-        self.assertEquals("foo", ir.Index)
-        self.assertEquals("bar", ir.Field)
-        self.assertEquals([1], ir.RowIDs)
-        self.assertEquals([2], ir.ColumnIDs)
-        self.assertEquals([], ir.RowKeys)
-        self.assertEquals([], ir.ColumnKeys)
-        self.assertEquals([3], ir.Timestamps)
+        self.assertEqual("foo", ir.Index)
+        self.assertEqual("bar", ir.Field)
+        self.assertEqual([1], ir.RowIDs)
+        self.assertEqual([2], ir.ColumnIDs)
+        self.assertEqual([], ir.RowKeys)
+        self.assertEqual([], ir.ColumnKeys)
+        self.assertEqual([3], ir.Timestamps)
 
     def test_serialize_row_id_column_key(self):
         field = get_schema(True, False)
@@ -268,13 +293,13 @@ class ImportRequestTestCase(unittest.TestCase):
         self.assertIsNotNone(bin)
         ir = internal.ImportRequest()
         ir.ParseFromString(bin)
-        self.assertEquals("foo", ir.Index)
-        self.assertEquals("bar", ir.Field)
-        self.assertEquals([1], ir.RowIDs)
-        self.assertEquals([], ir.ColumnIDs)
-        self.assertEquals([], ir.RowKeys)
-        self.assertEquals(["two"], ir.ColumnKeys)
-        self.assertEquals([3], ir.Timestamps)
+        self.assertEqual("foo", ir.Index)
+        self.assertEqual("bar", ir.Field)
+        self.assertEqual([1], ir.RowIDs)
+        self.assertEqual([], ir.ColumnIDs)
+        self.assertEqual([], ir.RowKeys)
+        self.assertEqual(["two"], ir.ColumnKeys)
+        self.assertEqual([3], ir.Timestamps)
 
     def test_serialize_row_key_column_id(self):
         field = get_schema(False, True)
@@ -283,13 +308,13 @@ class ImportRequestTestCase(unittest.TestCase):
         self.assertIsNotNone(bin)
         ir = internal.ImportRequest()
         ir.ParseFromString(bin)
-        self.assertEquals("foo", ir.Index)
-        self.assertEquals("bar", ir.Field)
-        self.assertEquals([], ir.RowIDs)
-        self.assertEquals([2], ir.ColumnIDs)
-        self.assertEquals(["one"], ir.RowKeys)
-        self.assertEquals([], ir.ColumnKeys)
-        self.assertEquals([3], ir.Timestamps)
+        self.assertEqual("foo", ir.Index)
+        self.assertEqual("bar", ir.Field)
+        self.assertEqual([], ir.RowIDs)
+        self.assertEqual([2], ir.ColumnIDs)
+        self.assertEqual(["one"], ir.RowKeys)
+        self.assertEqual([], ir.ColumnKeys)
+        self.assertEqual([3], ir.Timestamps)
 
     def test_serialize_row_key_column_key(self):
         field = get_schema(True, True)
@@ -298,13 +323,13 @@ class ImportRequestTestCase(unittest.TestCase):
         self.assertIsNotNone(bin)
         ir = internal.ImportRequest()
         ir.ParseFromString(bin)
-        self.assertEquals("foo", ir.Index)
-        self.assertEquals("bar", ir.Field)
-        self.assertEquals([], ir.RowIDs)
-        self.assertEquals([], ir.ColumnIDs)
-        self.assertEquals(["one"], ir.RowKeys)
-        self.assertEquals(["two"], ir.ColumnKeys)
-        self.assertEquals([3], ir.Timestamps)
+        self.assertEqual("foo", ir.Index)
+        self.assertEqual("bar", ir.Field)
+        self.assertEqual([], ir.RowIDs)
+        self.assertEqual([], ir.ColumnIDs)
+        self.assertEqual(["one"], ir.RowKeys)
+        self.assertEqual(["two"], ir.ColumnKeys)
+        self.assertEqual([3], ir.Timestamps)
 
     def test_import_request_invalid_format(self):
         field = get_schema(False, False)
@@ -326,9 +351,322 @@ class NodeTestCase(unittest.TestCase):
 
     def test_node_url(self):
         n1 = _Node("https", "foo.com", "")
-        self.assertEquals("https://foo.com", n1.url)
+        self.assertEqual("https://foo.com", n1.url)
         n2 = _Node("https", "foo.com", 9999)
-        self.assertEquals("https://foo.com:9999", n2.url)
+        self.assertEqual("https://foo.com:9999", n2.url)
+
+
+class SyncSchemaTestCase(unittest.TestCase):
+
+    def test_sync_schema(self):
+        schema = Schema()
+        index11 = schema.index("diff-index1")
+        index11.field("field1-1")
+        index11.field("field1-2")
+        index12 = schema.index("diff-index2")
+        index12.field("field2-1")
+        schema.index("remote-index-1").field("local-field-1")
+        schema.index("remote-index-1").field("remote-field-1")
+
+        client, pool_manager = get_mock_client()
+        pool_manager.respond("/schema", content=json.dumps({"indexes": [
+            {"name": "remote-index-1", "fields": [{"name": "remote-field-1"}]},
+        ]}).encode("utf-8"))
+        client.sync_schema(schema)
+        # only the indexes and fields missing on the server are created;
+        # sync_schema used to create every field of an index which exists on the server
+        target = {
+            "/index/diff-index1",
+            "/index/diff-index2",
+            "/index/diff-index1/field/field1-1",
+            "/index/diff-index1/field/field1-2",
+            "/index/diff-index2/field/field2-1",
+            "/index/remote-index-1/field/local-field-1",
+        }
+        created = pool_manager.paths("POST")
+        self.assertEqual(len(target), len(created))
+        self.assertEqual(target, set(created))
+        # the server schema is loaded into the local schema
+        self.assertTrue("remote-field-1" in schema.index("remote-index-1")._fields)
+
+
+class SchemaCacheTestCase(unittest.TestCase):
+
+    def test_schema_not_cached_by_default(self):
+        client, pool_manager = get_schema_client()
+        client.schema()
+        client.schema()
+        self.assertEqual(2, pool_manager.paths("GET").count("/schema"))
+
+    def test_schema_cached(self):
+        client, pool_manager = get_schema_client(schema_cache_ttl=60000)
+        schema1 = client.schema()
+        schema2 = client.schema()
+        self.assertEqual(1, pool_manager.paths("GET").count("/schema"))
+        # each call returns a separate Schema, which callers may modify
+        self.assertIsNot(schema1, schema2)
+        self.assertTrue(schema2.has_index("cached-index"))
+
+    def test_schema_cache_expires(self):
+        client, pool_manager = get_schema_client(schema_cache_ttl=1)
+        client.schema()
+        time.sleep(0.01)
+        client.schema()
+        self.assertEqual(2, pool_manager.paths("GET").count("/schema"))
+
+    def test_schema_cache_invalidated(self):
+        client, pool_manager = get_schema_client(schema_cache_ttl=60000)
+        index = Schema().index("cached-index")
+        field = index.field("cached-field")
+        client.schema()
+        changes = [
+            (client.create_index, index),
+            (client.delete_index, index),
+            (client.create_field, field),
+            (client.delete_field, field),
+        ]
+        for i, (change, target) in enumerate(changes):
+            change(target)
+            client.schema()
+            client.schema()
+            self.assertEqual(i + 2, pool_manager.paths("GET").count("/schema"))
+
+    def test_ensure_not_cached_by_default(self):
+        client, pool_manager = get_mock_client()
+        field = Schema().index("cached-index").field("cached-field")
+        for _ in range(2):
+            client.ensure_index(field.index)
+            client.ensure_field(field)
+        self.assertEqual(4, len(pool_manager.requests))
+
+    def test_ensure_existing(self):
+        client, pool_manager = get_mock_client()
+        pool_manager.default_response = (409, None, b"exists")
+        field = Schema().index("cached-index").field("cached-field")
+        client.ensure_index(field.index)
+        client.ensure_field(field)
+        self.assertEqual(["/index/cached-index", "/index/cached-index/field/cached-field"], pool_manager.paths("POST"))
+        self.assertRaises(IndexExistsError, client.create_index, field.index)
+        self.assertRaises(FieldExistsError, client.create_field, field)
+
+    def test_ensure_cached(self):
+        client, pool_manager = get_mock_client(schema_cache_ttl=60000)
+        field = Schema().index("cached-index").field("cached-field")
+        for _ in range(2):
+            client.ensure_index(field.index)
+            client.ensure_field(field)
+        self.assertEqual(2, len(pool_manager.requests))
+        # deleting the index forgets its fields too
+        client.delete_index(field.index)
+        client.ensure_index(field.index)
+        client.ensure_field(field)
+        self.assertEqual(5, len(pool_manager.requests))
+
+
+class CoordinatorTestCase(unittest.TestCase):
+
+    def test_coordinator_node_cached(self):
+        client, pool_manager = get_coordinator_client()
+        index = Schema().index("coordinator-index")
+        for _ in range(2):
+            client.query(index.raw_query("Count(Row(f=1))"))
+        target = ["/status", "/index/coordinator-index/query", "/index/coordinator-index/query"]
+        self.assertEqual(target, pool_manager.paths())
+        self.assertEqual(["coordinator:10101"] * 2, pool_manager.hosts[1:])
+
+    def test_coordinator_node_fetched_after_failure(self):
+        client, pool_manager = get_coordinator_client()
+        pool_manager.respond("/index/coordinator-index/query", status=500, content=b"not the coordinator")
+        pool_manager.respond("/index/coordinator-index/query")
+        index = Schema().index("coordinator-index")
+        query = index.raw_query("Count(Row(f=1))")
+        self.assertRaises(PilosaError, client.query, query)
+        client.query(query)
+        target = ["/status", "/index/coordinator-index/query", "/status", "/index/coordinator-index/query"]
+        self.assertEqual(target, pool_manager.paths())
+
+
+class ImportFieldTestCase(unittest.TestCase):
+
+    def test_import_concurrently(self):
+        client, pool_manager = get_import_client()
+        field = Schema().index("import-index").field("import-field")
+        bits = [Column(row_id=1, column_id=shard * 1048576 + i) for shard in range(10) for i in range(3)]
+        client.import_field(field, iter(bits), batch_size=6, thread_count=4)
+        self.assertEqual([bit.column_id for bit in bits], sorted(imported_column_ids(pool_manager)))
+
+    def test_import_concurrently_failure(self):
+        client, pool_manager = get_import_client()
+        pool_manager.respond("/internal/fragment/nodes?shard=7&index=import-index", status=500,
+                             content=b"import failed")
+        field = Schema().index("import-index").field("import-field")
+        bits = [Column(row_id=1, column_id=shard * 1048576) for shard in range(10)]
+        self.assertRaises(PilosaError, client.import_field, field, iter(bits), batch_size=1, thread_count=4)
+
+    def test_import_concurrently_bounded(self):
+        client, pool_manager = get_import_client()
+        field = Schema().index("import-index").field("import-field")
+        thread_count = 2
+        path = "/index/import-index/field/import-field/import"
+        imports_started = []
+
+        def reader():
+            for shard in range(10):
+                # at most thread_count batches may be imported while the next one is read
+                imports_started.append(pool_manager.paths("POST").count(path))
+                yield Column(row_id=1, column_id=shard * 1048576)
+
+        client.import_field(field, reader(), batch_size=1, thread_count=thread_count)
+        for shard, started in enumerate(imports_started):
+            self.assertTrue(started >= shard - thread_count, "%d batches read, %d imported" % (shard, started))
+        self.assertEqual(10, len(imported_column_ids(pool_manager)))
+
+    def test_fast_import_column_order(self):
+        client, pool_manager = get_import_client()
+        field = Schema().index("import-index").field("import-field")
+        columns = [Column(row_id=1, column_id=2), Column(row_id=0, column_id=70000),
+                   Column(row_id=1, column_id=1), Column(row_id=0, column_id=5)]
+        client.import_field(field, iter(columns), fast_import=True)
+        self.assertEqual({"": roaring_data([5, 70000, 1048577, 1048578])}, imported_roaring_views(pool_manager))
+
+    def test_fast_import_time_views(self):
+        client, pool_manager = get_import_client()
+        field = Schema().index("import-index").field("import-field",
+                                                     time_quantum=TimeQuantum.YEAR_MONTH_DAY_HOUR)
+        # 2018-01-01T00:00, 2018-01-01T00:59, 2018-01-01T01:00, 2018-02-03T04:05
+        columns = [Column(row_id=1, column_id=10, timestamp=1514764800),
+                   Column(row_id=1, column_id=11, timestamp=1514768399),
+                   Column(row_id=1, column_id=12, timestamp=1514768400),
+                   Column(row_id=2, column_id=13, timestamp=1517630700)]
+        client.import_field(field, iter(columns), fast_import=True)
+        row1 = 1048576
+        row2 = 2 * 1048576
+        target = {
+            "": roaring_data([row1 + 10, row1 + 11, row1 + 12, row2 + 13]),
+            "2018": roaring_data([row1 + 10, row1 + 11, row1 + 12, row2 + 13]),
+            "201801": roaring_data([row1 + 10, row1 + 11, row1 + 12]),
+            "20180101": roaring_data([row1 + 10, row1 + 11, row1 + 12]),
+            "2018010100": roaring_data([row1 + 10, row1 + 11]),
+            "2018010101": roaring_data([row1 + 12]),
+            "201802": roaring_data([row2 + 13]),
+            "20180203": roaring_data([row2 + 13]),
+            "2018020304": roaring_data([row2 + 13]),
+        }
+        self.assertEqual(target, imported_roaring_views(pool_manager))
+
+    def test_fast_import_clear(self):
+        client, pool_manager = get_import_client()
+        field = Schema().index("import-index").field("import-field")
+        for clear in [False, True]:
+            client.import_field(field, iter([Column(row_id=1, column_id=2)]), fast_import=True, clear=clear)
+        cleared = []
+        for method, path, body in pool_manager.requests:
+            if path == "/index/import-index/field/import-field/import-roaring/0":
+                request = internal.ImportRoaringRequest()
+                request.ParseFromString(bytes(body))
+                # the field is shadowed by the Clear method
+                cleared.append(dict((f.name, value) for f, value in request.ListFields()).get("Clear", False))
+        self.assertEqual([False, True], cleared)
+
+    def test_pure_python_protobuf_warned_once(self):
+        client, pool_manager = get_import_client()
+        field = Schema().index("import-index").field("import-field")
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        client.logger.addHandler(handler)
+        saved = pilosa.client._PURE_PYTHON_PROTOBUF, pilosa.client._protobuf_warning_logged
+        pilosa.client._PURE_PYTHON_PROTOBUF, pilosa.client._protobuf_warning_logged = True, False
+        try:
+            for _ in range(3):
+                client.import_field(field, iter([Column(row_id=1, column_id=2)]))
+        finally:
+            pilosa.client._PURE_PYTHON_PROTOBUF, pilosa.client._protobuf_warning_logged = saved
+            client.logger.removeHandler(handler)
+        warnings = [record for record in records if "protobuf" in record.getMessage()]
+        self.assertEqual(1, len(warnings))
+
+    def test_import_after_node_failure(self):
+        client, pool_manager = get_import_client()
+        path = "/index/import-index/field/import-field/import"
+        pool_manager.respond(path, error=urllib3.exceptions.MaxRetryError(None, path))
+        pool_manager.respond(path)
+        field = Schema().index("import-index").field("import-field")
+        bits = [Column(row_id=1, column_id=2)]
+        self.assertRaises(PilosaError, client.import_field, field, iter(bits))
+        client.import_field(field, iter(bits))
+        self.assertEqual([path, path], pool_manager.paths("POST"))
+
+    def test_node_client_reused(self):
+        client, pool_manager = get_coordinator_client()
+        field = Schema().index("import-index", keys=True).field("import-field")
+        for _ in range(2):
+            client.import_field(field, iter([Column(row_id=1, column_key="one")]))
+        target = ["/status", "/index/import-index/field/import-field/import",
+                  "/index/import-index/field/import-field/import"]
+        self.assertEqual(target, pool_manager.paths())
+        self.assertEqual(["coordinator:10101"] * 2, pool_manager.hosts[1:])
+
+
+def get_mock_client(**kwargs):
+    client = Client(**kwargs)
+    # the client gets its responses from the mock pool manager, without a server
+    pool_manager = client._Client__client = MockPoolManager()
+    return client, pool_manager
+
+
+def get_schema_client(**kwargs):
+    client, pool_manager = get_mock_client(**kwargs)
+    pool_manager.respond("/schema", content=json.dumps({"indexes": [
+        {"name": "cached-index", "fields": [{"name": "cached-field"}]},
+    ]}).encode("utf-8"))
+    return client, pool_manager
+
+
+def get_coordinator_client():
+    client, pool_manager = get_mock_client()
+    pool_manager.respond("/status", content=json.dumps({"nodes": [
+        {"isCoordinator": True, "uri": {"scheme": "http", "host": "coordinator", "port": 10101}},
+    ]}).encode("utf-8"))
+    return client, pool_manager
+
+
+def get_import_client():
+    client = Client()
+    # all shards are on a single node
+    pool_manager = client._Client__client = MockPoolManager(content=json.dumps([
+        {"uri": {"scheme": "http", "host": "node0", "port": 10101}},
+    ]).encode("utf-8"))
+    return client, pool_manager
+
+
+def imported_column_ids(pool_manager):
+    column_ids = []
+    for method, path, body in pool_manager.requests:
+        if method == "POST" and path.endswith("/import"):
+            request = internal.ImportRequest()
+            request.ParseFromString(bytes(body))
+            column_ids.extend(request.ColumnIDs)
+    return column_ids
+
+
+def imported_roaring_views(pool_manager):
+    views = {}
+    for method, path, body in pool_manager.requests:
+        if method == "POST" and "/import-roaring/" in path:
+            request = internal.ImportRoaringRequest()
+            request.ParseFromString(bytes(body))
+            views.update((view.Name, view.Data) for view in request.views)
+    return views
+
+
+def roaring_data(bits):
+    bitmap = Bitmap()
+    for bit in bits:
+        bitmap.add(bit)
+    bio = io.BytesIO()
+    bitmap.write_to(bio)
+    return bio.getvalue()
 
 
 def get_schema(index_keys, field_keys):
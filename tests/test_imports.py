@@ -34,6 +34,7 @@
 import calendar
 import datetime
 import unittest
+from io import StringIO
 
 from pilosa.exceptions import PilosaError
 from pilosa.imports import csv_column_reader, csv_field_value_reader, \
@@ -41,11 +42,6 @@ from pilosa.imports import csv_column_reader, csv_field_value_reader, \
     csv_row_id_column_key, csv_row_key_column_id, \
     csv_row_key_column_key, csv_column_key_value
 
-try:
-    from io import StringIO
-except ImportError:
-    from StringIO import StringIO
-
 
 class ImportsTestCase(unittest.TestCase):
 
@@ -51,6 +51,7 @@ class SchemaTestCase(unittest.TestCase):
         index11 = schema1.index("diff-index1")
         index11.field("field1-1")
         index11.field("field1-2")
+        index11.field("another-field")
         index12 = schema1.index("diff-index2")
         index12.field("field2-1")
 
@@ -109,7 +110,7 @@ class IndexTestCase(unittest.TestCase):
 
     def test_raw_query(self):
         q = projectIndex.raw_query("No validation whatsoever for raw queries")
-        self.assertEquals(
+        self.assertEqual(
             "No validation whatsoever for raw queries",
             q.serialize().query)
 
@@ -120,17 +121,17 @@ class IndexTestCase(unittest.TestCase):
         b4 = collabField.row(2)
 
         q1 = sampleIndex.union(b1, b2)
-        self.assertEquals(
+        self.assertEqual(
             "Union(Row(sample-field=10), Row(sample-field=20))",
             q1.serialize().query)
 
         q2 = sampleIndex.union(b1, b2, b3)
-        self.assertEquals(
+        self.assertEqual(
             "Union(Row(sample-field=10), Row(sample-field=20), Row(sample-field=42))",
             q2.serialize().query)
 
         q3 = sampleIndex.union(b1, b4)
-        self.assertEquals(
+        self.assertEqual(
             "Union(Row(sample-field=10), Row(collaboration=2))",
             q3.serialize().query)
 
@@ -141,17 +142,17 @@ class IndexTestCase(unittest.TestCase):
         b4 = collabField.row(2)
 
         q1 = sampleIndex.intersect(b1, b2)
-        self.assertEquals(
+        self.assertEqual(
             "Intersect(Row(sample-field=10), Row(sample-field=20))",
             q1.serialize().query)
 
         q2 = sampleIndex.intersect(b1, b2, b3)
-        self.assertEquals(
+        self.assertEqual(
             "Intersect(Row(sample-field=10), Row(sample-field=20), Row(sample-field=42))",
             q2.serialize().query)
 
         q3 = sampleIndex.intersect(b1, b4)
-        self.assertEquals(
+        self.assertEqual(
             "Intersect(Row(sample-field=10), Row(collaboration=2))",
             q3.serialize().query)
 
@@ -162,17 +163,17 @@ class IndexTestCase(unittest.TestCase):
         b4 = collabField.row(2)
 
         q1 = sampleIndex.difference(b1, b2)
-        self.assertEquals(
+        self.assertEqual(
             "Difference(Row(sample-field=10), Row(sample-field=20))",
             q1.serialize().query)
 
         q2 = sampleIndex.difference(b1, b2, b3)
-        self.assertEquals(
+        self.assertEqual(
             "Difference(Row(sample-field=10), Row(sample-field=20), Row(sample-field=42))",
             q2.serialize().query)
 
         q3 = sampleIndex.difference(b1, b4)
-        self.assertEquals(
+        self.assertEqual(
             "Difference(Row(sample-field=10), Row(collaboration=2))",
             q3.serialize().query)
 
@@ -181,17 +182,17 @@ class IndexTestCase(unittest.TestCase):
         b2 = sampleField.row(20)
         q1 = sampleIndex.xor(b1, b2)
 
-        self.assertEquals(
+        self.assertEqual(
             "Xor(Row(sample-field=10), Row(sample-field=20))",
             q1.serialize().query)
 
     def test_union0(self):
         q = sampleIndex.union()
-        self.assertEquals("Union()", q.serialize().query)
+        self.assertEqual("Union()", q.serialize().query)
 
     def test_union1(self):
         q = sampleIndex.union(sampleField.row(10))
-        self.assertEquals("Union(Row(sample-field=10))", q.serialize().query)
+        self.assertEqual("Union(Row(sample-field=10))", q.serialize().query)
 
     def test_intersect_invalid_row_count_fails(self):
         self.assertRaises(PilosaError, projectIndex.intersect)
@@ -204,12 +205,12 @@ class IndexTestCase(unittest.TestCase):
 
     def test_not_(self):
         q = sampleIndex.not_(sampleField.row(10))
-        self.assertEquals("Not(Row(sample-field=10))", q.serialize().query)
+        self.assertEqual("Not(Row(sample-field=10))", q.serialize().query)
 
     def test_count(self):
         b = collabField.row(42)
         q = projectIndex.count(b)
-        self.assertEquals(
+        self.assertEqual(
             "Count(Row(collaboration=42))",
             q.serialize().query)
 
@@ -219,12 +220,12 @@ class IndexTestCase(unittest.TestCase):
             "happy": True
         }
         q = projectIndex.set_column_attrs(5, attrs_map)
-        self.assertEquals(
+        self.assertEqual(
             u"SetColumnAttrs(5,happy=true,quote=\"\\\"Don't worry, be happy\\\"\")",
             q.serialize().query)
 
         q = projectIndex.set_column_attrs("some_id", attrs_map)
-        self.assertEquals(
+        self.assertEqual(
             u"SetColumnAttrs('some_id',happy=true,quote=\"\\\"Don't worry, be happy\\\"\")",
             q.serialize().query)
 
@@ -241,7 +242,7 @@ class IndexTestCase(unittest.TestCase):
                                 exclude_columns=True,
                                 exclude_row_attrs=True,
                                 shards=[1, 3])
-        self.assertEquals(
+        self.assertEqual(
             "Options(Row(collaboration=5),columnAttrs=true,excludeColumns=true,excludeRowAttrs=true,shards=[1,3])",
             q.serialize().query)
 
@@ -272,17 +273,17 @@ class FieldTestCase(unittest.TestCase):
 
     def test_row(self):
         q = collabField.row(5)
-        self.assertEquals(
+        self.assertEqual(
             "Row(collaboration=5)",
             q.serialize().query)
 
         q = collabField.row("b7feb014-8ea7-49a8-9cd8-19709161ab63")
-        self.assertEquals(
+        self.assertEqual(
             "Row(collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63')",
             q.serialize().query)
 
         q = collabField.row(True)
-        self.assertEquals(
+        self.assertEqual(
             "Row(collaboration=true)",
             q.serialize().query)
 
@@ -291,32 +292,32 @@ class FieldTestCase(unittest.TestCase):
 
     def test_set(self):
         qry = collabField.set(5, 10)
-        self.assertEquals(
+        self.assertEqual(
              u"Set(10,collaboration=5)",
             qry.serialize().query)
 
         qry = collabField.set(5, "some_id")
-        self.assertEquals(
+        self.assertEqual(
              u"Set('some_id',collaboration=5)",
             qry.serialize().query)
 
         qry = collabField.set("b7feb014-8ea7-49a8-9cd8-19709161ab63", 10)
-        self.assertEquals(
+        self.assertEqual(
              u"Set(10,collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63')",
             qry.serialize().query)
 
         qry = collabField.set("b7feb014-8ea7-49a8-9cd8-19709161ab63", "some_id")
-        self.assertEquals(
+        self.assertEqual(
             u"Set('some_id',collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63')",
             qry.serialize().query)
 
         qry = collabField.set(True, "some_id")
-        self.assertEquals(
+        self.assertEqual(
             u"Set('some_id',collaboration=true)",
             qry.serialize().query)
 
         qry = collabField.set(False, "some_id")
-        self.assertEquals(
+        self.assertEqual(
             u"Set('some_id',collaboration=false)",
             qry.serialize().query)
 
@@ -327,29 +328,29 @@ class FieldTestCase(unittest.TestCase):
     def test_set_with_timestamp(self):
         timestamp = datetime(2017, 4, 24, 12, 14)
         qry = collabField.set(10, 20, timestamp)
-        self.assertEquals(
+        self.assertEqual(
             u"Set(20,collaboration=10, 2017-04-24T12:14)",
             qry.serialize().query
         )
 
     def test_clear(self):
         qry = collabField.clear(5, 10)
-        self.assertEquals(
+        self.assertEqual(
             "Clear(10,collaboration=5)",
             qry.serialize().query)
 
         qry = collabField.clear(5, 'some_id')
-        self.assertEquals(
+        self.assertEqual(
             "Clear('some_id',collaboration=5)",
             qry.serialize().query)
 
         qry = collabField.clear("b7feb014-8ea7-49a8-9cd8-19709161ab63", 10)
-        self.assertEquals(
+        self.assertEqual(
             "Clear(10,collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63')",
             qry.serialize().query)
 
         qry = collabField.clear("b7feb014-8ea7-49a8-9cd8-19709161ab63", "some_id")
-        self.assertEquals(
+        self.assertEqual(
             "Clear('some_id',collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63')",
             qry.serialize().query)
 
@@ -359,17 +360,17 @@ class FieldTestCase(unittest.TestCase):
 
     def test_topn(self):
         q1 = collabField.topn(27)
-        self.assertEquals(
+        self.assertEqual(
             u"TopN(collaboration,n=27)",
             q1.serialize().query)
 
         q2 = collabField.topn(10, collabField.row(3))
-        self.assertEquals(
+        self.assertEqual(
             u"TopN(collaboration,Row(collaboration=3),n=10)",
             q2.serialize().query)
 
         q3 = sampleField.topn(12, collabField.row(7), "category", 80, 81)
-        self.assertEquals(
+        self.assertEqual(
             u"TopN(sample-field,Row(collaboration=7),n=12,attrName='category',attrValues=[80,81])",
             q3.serialize().query)
 
@@ -378,12 +379,12 @@ class FieldTestCase(unittest.TestCase):
         end = datetime(2000, 2, 2, 3, 4)
 
         q1 = collabField.range(10, start, end)
-        self.assertEquals(
+        self.assertEqual(
             u"Range(collaboration=10,1970-01-01T00:00,2000-02-02T03:04)",
             q1.serialize().query)
 
         q3 = collabField.range("b7feb014-8ea7-49a8-9cd8-19709161ab63", start, end)
-        self.assertEquals(
+        self.assertEqual(
             u"Range(collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63',1970-01-01T00:00,2000-02-02T03:04)",
             q3.serialize().query)
 
@@ -392,38 +393,38 @@ class FieldTestCase(unittest.TestCase):
         end = datetime(2000, 2, 2, 3, 4)
 
         q1 = collabField.row(10, from_=start, to=end)
-        self.assertEquals(
+        self.assertEqual(
             u"Row(collaboration=10,from='1970-01-01T00:00',to='2000-02-02T03:04')",
             q1.serialize().query)
 
         q3 = collabField.row("b7feb014-8ea7-49a8-9cd8-19709161ab63", start, end)
-        self.assertEquals(
+        self.assertEqual(
             u"Row(collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63',from='1970-01-01T00:00',to='2000-02-02T03:04')",
             q3.serialize().query)
 
     def test_row_range_only_from(self):
         start = datetime(1970, 1, 1, 0, 0)
         q1 = collabField.row(10, from_=start)
-        self.assertEquals(
+        self.assertEqual(
             u"Row(collaboration=10,from='1970-01-01T00:00')",
             q1.serialize().query
         )
 
         q3 = collabField.row("b7feb014-8ea7-49a8-9cd8-19709161ab63", from_=start)
-        self.assertEquals(
+        self.assertEqual(
             u"Row(collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63',from='1970-01-01T00:00')",
             q3.serialize().query)
 
     def test_row_range_only_to(self):
         end = datetime(2000, 2, 2, 3, 4)
         q1 = collabField.row(10, to=end)
-        self.assertEquals(
+        self.assertEqual(
             u"Row(collaboration=10,to='2000-02-02T03:04')",
             q1.serialize().query
         )
 
         q3 = collabField.row("b7feb014-8ea7-49a8-9cd8-19709161ab63", to=end)
-        self.assertEquals(
+        self.assertEqual(
             u"Row(collaboration='b7feb014-8ea7-49a8-9cd8-19709161ab63',to='2000-02-02T03:04')",
             q3.serialize().query)
 
@@ -433,38 +434,38 @@ class FieldTestCase(unittest.TestCase):
             "active": True
         }
         q = collabField.set_row_attrs(5, attrs_map)
-        self.assertEquals(
+        self.assertEqual(
             u'SetRowAttrs(collaboration,5,active=true,quote="\\"Don\'t worry, be happy\\"")',
             q.serialize().query)
 
     def test_store(self):
         q = sampleField.store(collabField.row(5), 10)
-        self.assertEquals(
+        self.assertEqual(
             u"Store(Row(collaboration=5),sample-field=10)",
             q.serialize().query
         )
 
         q = sampleField.store(collabField.row("five"), "ten")
-        self.assertEquals(
+        self.assertEqual(
             u"Store(Row(collaboration='five'),sample-field='ten')",
             q.serialize().query
         )
 
     def test_clear_row(self):
         q = collabField.clear_row(5)
-        self.assertEquals(
+        self.assertEqual(
             "ClearRow(collaboration=5)",
             q.serialize().query
         )
 
         q = collabField.clear_row("five")
-        self.assertEquals(
+        self.assertEqual(
             "ClearRow(collaboration='five')",
             q.serialize().query
         )
 
         q = collabField.clear_row(True)
-        self.assertEquals(
+        self.assertEqual(
             "ClearRow(collaboration=true)",
             q.serialize().query
         )
@@ -473,70 +474,70 @@ class FieldTestCase(unittest.TestCase):
 
     def test_field_lt(self):
         q = collabField.lt(10)
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration < 10)",
             q.serialize().query)
 
     def test_field_lte(self):
         q = collabField.lte(10)
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration <= 10)",
             q.serialize().query)
 
     def test_field_gt(self):
         q = collabField.gt(10)
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration > 10)",
             q.serialize().query)
 
     def test_field_gte(self):
         q = collabField.gte(10)
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration >= 10)",
             q.serialize().query)
 
     def test_field_equals(self):
         q = collabField.equals(10)
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration == 10)",
             q.serialize().query)
 
     def test_field_not_equals(self):
         q = collabField.not_equals(10)
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration != 10)",
             q.serialize().query)
 
     def test_field_not_null(self):
         q = collabField.not_null()
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration != null)",
             q.serialize().query)
 
     def test_field_between(self):
         q = collabField.between(10, 20)
-        self.assertEquals(
+        self.assertEqual(
             "Range(collaboration >< [10,20])",
             q.serialize().query)
 
     def test_field_sum(self):
         q = collabField.sum(collabField.row(10))
-        self.assertEquals(
+        self.assertEqual(
             "Sum(Row(collaboration=10), field='collaboration')",
             q.serialize().query)
         q = collabField.sum()
-        self.assertEquals(
+        self.assertEqual(
             "Sum(field='collaboration')",
             q.serialize().query)
 
     def test_field_set_value(self):
         q = collabField.setvalue(10, 20)
-        self.assertEquals(
+        self.assertEqual(
             "Set(10,collaboration=20)",
             q.serialize().query)
 
         q = collabField.setvalue("some_id", 20)
-        self.assertEquals(
+        self.assertEqual(
             "Set('some_id',collaboration=20)",
             q.serialize().query)
 
@@ -35,7 +35,7 @@ import unittest
 
 from pilosa.exceptions import PilosaError
 from pilosa.internal import public_pb2 as internal
-from pilosa.response import QueryResponse, QUERYRESULT_ROW
+from pilosa.response import QueryResponse, RowResult, QUERYRESULT_ROW
 
 
 class QueryResultTestCase(unittest.TestCase):
@@ -58,3 +58,19 @@ class QueryResultTestCase(unittest.TestCase):
         bin = qr.SerializeToString()
         self.assertRaises(PilosaError, QueryResponse._from_protobuf, bin)
 
+    def test_row_keys(self):
+        qr = internal.QueryResponse()
+        result1 = qr.Results.add()
+        result1.Type = QUERYRESULT_ROW
+        result1.Row.Keys.extend(["foo", "bar"])
+        bin = qr.SerializeToString()
+        row = QueryResponse._from_protobuf(bin).result.row
+        self.assertEqual(["foo", "bar"], row.keys)
+        self.assertTrue(isinstance(row.keys, list))
+        # the keys are a copy, changing them doesn't change the protobuf message
+        internal_row = internal.Row()
+        internal_row.Keys.extend(["foo", "bar"])
+        row = RowResult.from_internal(internal_row)
+        row.keys.append("baz")
+        row.keys[0] = "qux"
+        self.assertEqual(["foo", "bar"], list(internal_row.Keys))